@@ -10,36 +10,42 @@ Developed with assistance from ChatGPT (OpenAI GPT-5 mini) :)
 #!/usr/bin/env python3
 import sys
 import os
-import subprocess, json
-import exifread, re
+import io
+import sqlite3
+import re
 import html
 import unicodedata
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QToolTip,
     QTextEdit, QFileDialog, QPushButton, QHBoxLayout, QSplitter,
-    QSizePolicy, QScrollArea, QGridLayout, QStackedWidget, QTextBrowser
+    QSizePolicy, QStackedWidget, QTextBrowser,
+    QListView, QStyledItemDelegate, QStyle, QLineEdit,
+    QTreeWidget, QTreeWidgetItem
 )
-from PyQt6.QtGui import QPixmap, QShortcut, QKeySequence, QPalette, QColor, QIcon, QClipboard, QCursor
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QShortcut, QKeySequence, QPalette, QColor, QIcon, QClipboard, QCursor
 from PyQt6.QtCore import Qt, QTimer, QRect, QPropertyAnimation, QEasingCurve, QPoint
-from PIL import Image
-from threading import Thread
-from PyQt6.QtCore import pyqtSignal
-from collections import namedtuple
+from threading import Thread, Lock, Condition
+from PyQt6.QtCore import pyqtSignal, QObject, QAbstractListModel, QModelIndex, QSize, QEvent, QFileSystemWatcher
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+import bisect
+import itertools
+from collections import OrderedDict, deque
 import time
 import traceback
 from PyQt6.QtCore import qInstallMessageHandler, QtMsgType
 
-DEBUG = True                            ##########################################################################
+# metaadat kinyerés: Qt-mentes modul (a CLI és a worker folyamatok is ezt használják)
+from mapic.meta import (
+    debug_log, META_PARSER_VERSION, empty_meta,
+    meta_to_json, meta_from_json, extract_prompts, shutdown_exiftool,
+)
+from mapic.files import iter_images
 
-def debug_log(*args):
-    if DEBUG:
-        print("[DEBUG]", *args)          ##################################################
-        
 def global_exception_hook(exctype, value, tb):
     print("[UNCAUGHT EXCEPTION]")
     traceback.print_exception(exctype, value, tb)
 
-sys.excepthook = global_exception_hook
 img_width=0
 img_height=0
 
@@ -47,138 +53,6 @@ img_height=0
 def qt_message_handler(mode, context, message):
     print(f"[Qt {mode.name}] {message}")
 
-qInstallMessageHandler(qt_message_handler)
-
-# Definiáljuk a metaadat struktúrát
-ImageMeta = namedtuple("ImageMeta", [
-    "prompt",           # 0
-    "neg_prompt",      
-    "model",           
-    "sampler",         
-    "scheduler",       
-    "steps",           
-    "cfg_scale",       
-    "seed",            
-    "denoise",          # 8 - opcionális, ha kell
-    "vae",            
-    "loras"             # 10 - lista a több LoRA-ra
-])
-
-def empty_meta():
-    """Visszaad egy alapértelmezett, üres ImageMeta namedtuple-t."""
-    return ImageMeta(
-        prompt="N/A",
-        neg_prompt="N/A",
-        model="-",
-        sampler="-",
-        scheduler="-",
-        steps="-",
-        cfg_scale="-",
-        seed="-",
-        denoise="-",
-        vae="-",
-        loras=[]
-    )
-
-def find_all_keys(d, key):
-    """
-    Rekurzívan megkeresi az összes adott kulcsot a JSON-ban.
-    Minden előfordulás értékét listában adja vissza.
-    """
-    results = []
-    if isinstance(d, dict):
-        for k, v in d.items():
-            if k == key:
-                results.append(v)
-            elif isinstance(v, (dict, list)):
-                results.extend(find_all_keys(v, key))
-    elif isinstance(d, list):
-        for item in d:
-            results.extend(find_all_keys(item, key))
-    return results
-
-def extract_loras_from_usercomment(raw_uc):
-    """
-    Kinyeri a LoRA-kat a JPG UserComment mezőből JSON formátumból.
-    Visszaad egy listát: [(name, weight), ...]
-    Ha hiba történik, kiírja a konzolra, de nem áll le.
-    """
-    loras = []
-    if isinstance(raw_uc, str):
-        raw_text = raw_uc
-    else:
-        try:
-            raw_text = json.dumps(raw_uc, ensure_ascii=False)
-        except Exception:
-            raw_text = str(raw_uc)
-
-    try:
-        # A UserComment tartalmazhat több JSON objektumot egymás után
-        # Például: [{"type":"lora",...}, {"type":"lora",...}]
-        matches = re.findall(r'\{[^\}]*"type"\s*:\s*"lora"[^\}]*\}', raw_text)
-        for m in matches:
-            try:
-                d = json.loads(m)
-                if d.get("type") == "lora":
-                    name = d.get("modelName", "Unknown")
-                    weight = d.get("weight", 1.0)
-                    loras.append((name, weight))
-            except Exception as inner_e:
-                debug_log(f"[ERROR] Failed to parse LoRA block: {inner_e}\nBlock: {m}")
-                continue
-
-    except Exception as e:
-        debug_log(f"[ERROR] Failed to extract LoRA from UserComment: {e}\nUserComment: {raw_text}")
-
-    return loras
-
-def extract_loras(obj):
-    """Kinyeri a LoRA-kat PNG formátumokból.
-    Támogatja a 'lora_name' + 'strength_model' mezőket ÉS a <lora:name:weight> formátumot is.
-    Visszatér: [(name, weight), ...]"""
-    
-    results = []
-
-    # --- 1) JSON-szerű kulcsok keresése ---
-    def recursive_find_lora(o):
-        if isinstance(o, dict):
-            # ha tartalmaz lora_name és strength_model kulcsot
-            if "lora_name" in o:
-                name = o["lora_name"]
-                weight = o.get("strength_model", o.get("weight", 1.0))
-                results.append((name, weight))
-            # rekurzió a többi kulcsra
-            for v in o.values():
-                recursive_find_lora(v)
-        elif isinstance(o, list):
-            for item in o:
-                recursive_find_lora(item)
-
-    recursive_find_lora(obj)
-
-    # --- 2) Text formátum (pl. <lora:Name:0.8>) keresése ---
-    if isinstance(obj, str):
-        text = obj
-    else:
-        text = str(obj)
-
-    lora_pattern = r"<lora:([^:>]+):([\d.]+)>"
-    matches = re.findall(lora_pattern, text)
-    for name, weight in matches:
-        try:
-            w = float(weight)
-        except ValueError:
-            w = 1.0
-        results.append((name.strip(), w))
-
-    # --- 3) Duplikátumok kiszűrése (név alapján) ---
-    unique = {}
-    for name, weight in results:
-        unique[name] = weight  # utolsó előfordulás marad
-    final_list = [(n, unique[n]) for n in unique]
-
-    return final_list
-    
 # --- HTML/CSS stílus definíció ---
 STYLE_LIGHT = """
 <style>
@@ -207,323 +81,370 @@ a { text-decoration: none; font-size:16px;}
 </style>
 """
 
-def decode_surrogate_pair(txt):
-    if not txt:
-        return "-"
-    try:
-        import codecs
-        return codecs.decode(txt, 'unicode_escape')
-    except Exception:
-        return txt
-        
-def decode_surrogates(txt):
-    if not txt:
-        return "-"
-    try:
-        # kényszerített dekódolás surrogate-okból
-        return txt.encode('utf-16', 'surrogatepass').decode('utf-16')
-    except Exception:
-        return txt
-    
-# ---------- Prompt extract (robosztusabb) ----------
-def extract_from_usercomment(raw_uc):
-    pos = neg = step = sampler = cfg = seed = denoise = scheduler = vae = loras = lora_names = lora_strengths = "no"
-    try:
-        # --- JSON-szerű formátum ---
-        if raw_uc.strip().startswith("{"):
-            data = json.loads(raw_uc)
-
-            # Positive/negative prompt
-            if "extraMetadata" in data:
-                extra = json.loads(data["extraMetadata"])
-                pos = extra.get("prompt", "-")
-                neg = extra.get("negativePrompt", "-")
-                sampler = extra.get("sampler", "-")
-                step = str(extra.get("steps", "-"))
-                cfg = str(extra.get("cfgScale", "-"))
-                ckpt = extra.get("modelName", "-")  # ha van
-                seed = str(extra.get("seed", "-")) 
-                scheduler = str(extra.get("scheduler", "-")) 
-                denoise = str(extra.get("denoise", "-"))
-                vae = str(extra.get("vae", "-"))
-                loras = extract_loras_from_usercomment(data)
-                if not seed or seed == "-":
-                    seeds = find_all_keys(data, "seed")
-                    seed = seeds[0] if seeds else "-"
-                if not scheduler or scheduler == "-":
-                    schedulers = find_all_keys(data, "scheduler")
-                    scheduler = schedulers[0] if schedulers else "-"
-                if not loras or loras == "no":
-                    lora_names = find_all_keys(data, "lora_name")
-                    lora_strengths = find_all_keys(data, "strength_model")
-                    loras = list(zip(lora_names, lora_strengths))
-            
-            # Bizonyos A1111/Comfy mentésnél a text közvetlenül van
-            for k, v in data.items():
-                if isinstance(v, dict) and v.get("class_type") == "smZ CLIPTextEncode":
-                    if v["_meta"]["title"] == "Positive":
-                        pos = v["inputs"].get("text", pos)
-                    elif v["_meta"]["title"] == "Negative":
-                        neg = v["inputs"].get("text", neg)
-
-                if isinstance(v, dict) and v.get("class_type") == "CheckpointLoaderSimple":
-                    ckpt = v["inputs"].get("ckpt_name", ckpt)
-
-                if isinstance(v, dict) and v.get("class_type") == "FaceDetailer":
-                    step = str(v["inputs"].get("steps", step))
-                    cfg = str(v["inputs"].get("cfg", cfg))
-                    sampler = v["inputs"].get("sampler_name", sampler)
-                    seed = str(v["inputs"].get("seed", seed))
-                    scheduler = str(v["inputs"].get("scheduler", scheduler))
-                    denoise = str(v["inputs"].get("denoise", denoise))
-                    vae = str(v["inputs"].get("vae", seed))
-                    loras = extract_loras_from_usercomment(raw_uc)
-
-        # --- sima szöveges formátum ---
-        else:
-            # Positive prompt (eleje a "Steps:" előtt)
-            m = re.split(r"Steps:|steps:", raw_uc, 1)
-            if len(m) > 1:
-                pos = m[0].strip().rstrip(",.")
-            else:
-                pos = raw_uc.strip()
-
-            # Negative prompt
-            neg_m = re.search(r"Negative prompt:\s*(.*)", raw_uc, re.IGNORECASE)
-            if neg_m:
-                neg = neg_m.group(1).strip()
-
-            # Steps
-            step_m = re.search(r"Steps:\s*(\d+)", raw_uc)
-            if step_m:
-                step = step_m.group(1)
-
-            # Sampler
-            sampler_m = re.search(r"Sampler:\s*([^\n,]+)", raw_uc)
-            if sampler_m:
-                sampler = sampler_m.group(1).strip()
-
-            # CFG
-            cfg_m = re.search(r"CFG scale:\s*([\d.]+)", raw_uc, re.IGNORECASE)
-            if cfg_m:
-                cfg = cfg_m.group(1)
-
-            # Seed
-            seed_m = re.search(r"Seed:\s*(\d+)", raw_uc)
-            if seed_m:
-                seed = seed_m.group(1)
-
-            # Scheduler
-            scheduler_m = re.search(r"Scheduler:\s*(\d+)", raw_uc)
-            if scheduler_m:
-                scheduler = scheduler_m.group(1)
-
-            # Denoise
-            denoise_m = re.search(r"Denoise:\s*(\d+)", raw_uc)
-            if denoise_m:
-                denoise = denoise_m.group(1)
-
-            # Vae
-            vae_m = re.search(r"Vae:\s*(\d+)", raw_uc)
-            if vae_m:
-                vae = vae_m.group(1)
-
-            # Lora
-            loras = extract_loras_from_usercomment(raw_uc)
-
-            # ModelName
-            model_m = re.search(r'"modelName":"([^"]+)"', raw_uc)
-            if model_m:
-                ckpt = model_m.group(1)
-                
-            pos = decode_surrogate_pair(pos)
-            neg = decode_surrogate_pair(neg)
-            ckpt = decode_surrogate_pair(ckpt)
-
-#    except Exception as e:
-#        pos = f"Error: {e}"
-
-    except Exception as e:
-        debug_log(f"[ERROR] extract_prompts_jpg_useComments: ({e})")
-    
-    return ImageMeta(
-        prompt = pos,
-        neg_prompt = neg,
-        model = ckpt,
-        sampler = sampler,
-        scheduler = scheduler,
-        steps = step,
-        cfg_scale = cfg,
-        seed = seed,
-        denoise = denoise,
-        vae = vae,
-        loras = loras           # lista
-    )
-        
-def extract_prompts_jpg(image_path):
-    try:
-        # 1) exiftool meghívása JSON kimenettel
-        result = subprocess.run(
-            ["exiftool", "-j", "-UserComment", image_path],
-            capture_output=True, text=True
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            data = json.loads(result.stdout)
-            if data and "UserComment" in data[0]:
-                raw_uc = data[0]["UserComment"]
+# ---------- metaadat index (SQLite, path + size + mtime_ns kulccsal) ----------
+# ezekben a mezőkben keres a szöveges keresés (FTS5 oszlopok)
+SEARCH_FIELDS = ("prompt", "neg_prompt", "model", "loras")
 
-                parsed = extract_from_usercomment(raw_uc)
-                if parsed:
-                    return parsed
+def mapic_cache_dir():
+    """Felhasználói cache könyvtár (~/.cache/mapic, Windowson %LOCALAPPDATA%/mapic)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, "mapic")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def open_cache_db(db_path, setup, what):
+    """
+    SQLite cache megnyitása + séma (setup(db)). Az SQLite lustán nyit, így a sérült /
+    nem adatbázis fájl csak az első utasításnál derül ki: ilyenkor (DatabaseError)
+    a fájlt töröljük és újra létrehozzuk; ha ez sem megy (vagy pl. zárolt), memóriában
+    dolgozunk - a cache soha nem akadályozhatja az indulást.
+    """
+    def attempt(path):
+        db = sqlite3.connect(path, check_same_thread=False)
+        try:
+            setup(db)
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
 
-        # ha nincs értelmezhető adat
-        return empty_meta()
+    if db_path != ":memory:":
+        try:
+            return attempt(db_path)
+        except sqlite3.OperationalError as e:
+            debug_log(f"[ERROR] {what} open {db_path}: ({e}), using memory")
+        except sqlite3.DatabaseError as e:
+            debug_log(f"[ERROR] {what} {db_path} is damaged: ({e}), recreating")
+            try:
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(db_path + suffix):
+                        os.remove(db_path + suffix)
+                return attempt(db_path)
+            except (sqlite3.Error, OSError) as e:
+                debug_log(f"[ERROR] {what} recreate {db_path}: ({e}), using memory")
+    return attempt(":memory:")
+
+class MetaIndex:
+    """
+    Perzisztens ImageMeta cache. Egy bejegyzés csak akkor érvényes, ha a fájl
+    mérete, mtime_ns-e és a parser verzió is egyezik - különben újraparse-olunk.
+    Szálbiztos (egy kapcsolat + Lock).
+    """
 
-    except Exception as e:
-        debug_log(f"[ERROR] extract_prompts_jpg: ({e})")
-        return empty_meta()
-        
+    def __init__(self, db_path=None):
+        if db_path is None:
+            try:
+                db_path = os.path.join(mapic_cache_dir(), "meta.sqlite3")
+            except OSError as e:
+                debug_log(f"[ERROR] meta index dir: ({e}), using memory")
+                db_path = ":memory:"
+        self._lock = Lock()
+        self._db = open_cache_db(db_path, self._setup, "meta index")
+        with self._lock:
+            self.fts = self._init_fts()
 
-def extract_prompts_png(image_path):
-    try:
-        img = Image.open(image_path)
-        metadata = img.info
+    @staticmethod
+    def _setup(db):
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+            " version INTEGER, data TEXT)"
+        )
+        db.commit()
 
-        # gyakori kulcsok, ahol a prompt/params előfordulhat
-        raw_prompt = metadata.get("prompt") or metadata.get("parameters") or metadata.get("Description") or metadata.get("comment") or None
-        if not raw_prompt:
-            return empty_meta()
+    def _init_fts(self):
+        """
+        FTS5 keresőindex a prompt / neg_prompt / model / loras mezőkre (meta.rowid = meta_fts.rowid).
+        Triggerek tartják szinkronban, így minden put automatikusan indexel.
+        False, ha az SQLite FTS5 vagy JSON1 nélkül készült (ilyenkor LIKE keresés marad).
+        """
+        try:
+            # INSERT OR REPLACE törlése csak így futtatja a DELETE triggert
+            self._db.execute("PRAGMA recursive_triggers=ON")
+            exists = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name='meta_fts'").fetchone()
+            if exists:
+                return True
+            def cols(src):
+                return ", ".join(f"json_extract({src}, '$.{c}')" for c in SEARCH_FIELDS)
+            self._db.executescript(f"""
+                CREATE VIRTUAL TABLE meta_fts USING fts5(
+                    {", ".join(SEARCH_FIELDS)}, tokenize='unicode61');
+                CREATE TRIGGER meta_fts_ins AFTER INSERT ON meta BEGIN
+                    INSERT INTO meta_fts(rowid, prompt, neg_prompt, model, loras)
+                    VALUES (new.rowid, {cols("new.data")});
+                END;
+                CREATE TRIGGER meta_fts_del AFTER DELETE ON meta BEGIN
+                    DELETE FROM meta_fts WHERE rowid = old.rowid;
+                END;
+                CREATE TRIGGER meta_fts_upd AFTER UPDATE OF data ON meta BEGIN
+                    DELETE FROM meta_fts WHERE rowid = old.rowid;
+                    INSERT INTO meta_fts(rowid, prompt, neg_prompt, model, loras)
+                    VALUES (new.rowid, {cols("new.data")});
+                END;
+                INSERT INTO meta_fts(rowid, prompt, neg_prompt, model, loras)
+                    SELECT rowid, {cols("data")} FROM meta;
+            """)
+            self._db.commit()
+            return True
+        except sqlite3.Error as e:
+            debug_log(f"[ERROR] meta index fts5: ({e}), search falls back to LIKE")
+            self._db.rollback()
+            return False
 
-        # Ha raw_prompt nem JSON, próbáljuk meg JSON-ként parse-olni továbbra is.
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path, stat=None):
+        """Érvényes cache bejegyzés vagy None."""
+        size, mtime_ns = stat or self._stat(path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM meta WHERE path=? AND size=? AND mtime_ns=? AND version=?",
+                (path, size, mtime_ns, META_PARSER_VERSION)
+            ).fetchone()
+        if row is None:
+            return None
         try:
-            prompt_json = json.loads(raw_prompt)
-        except Exception:
-            # Ha nem JSON, visszaadjuk a teljes stringet mint positive prompt (biztonsági fallback)
-            text_all = str(raw_prompt)
-            text_all = " ".join(text_all.split())  # collapse whitespace
-            meta = empty_meta()
-            return meta._replace(prompt=text_all)
-
-        # --- összegyűjtjük az első két "text" mezőt rekurzívan ---
-        texts = []
-        def collect_texts(obj):
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    if k == "text" and isinstance(v, str):
-                        texts.append(v)
-                    else:
-                        collect_texts(v)
-            elif isinstance(obj, list):
-                for item in obj:
-                    collect_texts(item)
-        collect_texts(prompt_json)
-
-        pos = texts[0] if len(texts) > 0 else "N/A"
-        neg = texts[1] if len(texts) > 1 else "N/A"
-
-        # --- kereső segédfüggvény (bárhol a JSON-ban) ---
-        def find_key(obj, target):
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    if k == target:
-                        return v
-                    res = find_key(v, target)
-                    if res is not None:
-                        return res
-            elif isinstance(obj, list):
-                for item in obj:
-                    res = find_key(item, target)
-                    if res is not None:
-                        return res
+            return meta_from_json(row[0])
+        except Exception as e:
+            debug_log(f"[ERROR] meta index decode {path}: ({e})")
             return None
 
-        ckpt     = find_key(prompt_json, "ckpt_name") or "-"
-        sampler  = find_key(prompt_json, "sampler_name") or "-"
-        scheduler= find_key(prompt_json, "scheduler") or "-"
-        step     = find_key(prompt_json, "steps") or "-"
-        cfg      = find_key(prompt_json, "cfg") or "-"
-        seed     = find_key(prompt_json, "seed") or "-"
-        denoise     = find_key(prompt_json, "denoise") or "-"
-        vae     = find_key(prompt_json, "vae") or "-"
-        loras = extract_loras(prompt_json)
-
-        return ImageMeta(
-            prompt = pos,
-            neg_prompt = neg,
-            model = ckpt,
-            sampler = sampler,
-            scheduler = scheduler,
-            steps = step,
-            cfg_scale = cfg,
-            seed = seed,
-            denoise = denoise,
-            vae = vae,
-            loras = loras           # lista
-        )
+    def put_many(self, items):
+        """items: [(path, (size, mtime_ns), ImageMeta), ...]"""
+        rows = [(p, st[0], st[1], META_PARSER_VERSION, meta_to_json(m)) for p, st, m in items]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?)", rows)
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
 
-    except Exception as e:        
-        result = ImageMeta("Error", *["N/A"]*11)
-        debug_log(f"[ERROR] extract_prompts_png: ({e})")
+    def put(self, path, meta, stat=None):
+        self.put_many([(path, stat or self._stat(path), meta)])
 
-def extract_prompts(fname):
-    ext = os.path.splitext(fname)[1].lower()
-    pos = neg = step = sampler = cfg = seed = denoise = scheduler = vae = loras = "no"
-    
-    if ext == ".png":
-        from PIL import Image
-        import re, json
-
-        img = Image.open(fname)
-        metadata = img.info
-
-        if "prompt" in metadata:
-            return extract_prompts_png(fname)  # meglévő JSON feldolgozás
-        elif "parameters" in metadata:
-            raw = metadata["parameters"]
-
-            pos = re.search(r'^(.*?)\s*,?\s*Negative prompt:', raw, re.DOTALL)
-            neg = re.search(r'Negative prompt:\s*(.*?)\s*,?\s*Steps:', raw)
-            sampler = re.search(r'Sampler:\s*(.*?)(?=,|$)', raw)
-            cfg = re.search(r'CFG scale:\s*(.*?)(?=,|$)', raw)
-            step = re.search(r'Steps:\s*(.*?)(?=,|$)', raw)
-            seed = re.search(r'Seed:\s*(.*?)(?=,|$)', raw)
-            ckpt = re.search(r'Model:\s*(.*?)(?=,|$)', raw)
-            scheduler = re.search(r'scheduler:\s*(.*?)(?=,|$)', raw)
-            denoise = re.search(r'denoise:\s*(.*?)(?=,|$)', raw)
-            vae = re.search(r'Vae:\s*(.*?)(?=,|$)', raw)
-            loras = extract_loras(raw)
-            
-            pos = pos.group(1).replace("\n", " ") if pos else "N/A"
-            neg = neg.group(1).replace("\n", " ") if neg else "N/A"
-            ckpt = ckpt.group(1) if ckpt else "-"
-            sampler = sampler.group(1) if sampler else "-"
-            step = step.group(1) if step else "-"
-            scheduler = scheduler.group(1) if scheduler else "-"
-            cfg = cfg.group(1) if cfg else "-"
-            seed = seed.group(1) if seed else "-"
-            denoise = denoise.group(1) if denoise else "-"
-            vae = vae.group(1) if vae else "-"
-            
-            return ImageMeta(
-                prompt=pos,
-                neg_prompt=neg,
-                model=ckpt,
-                sampler=sampler,
-                scheduler=scheduler,
-                steps=step,
-                cfg_scale=cfg,
-                seed=seed,
-                denoise=denoise,
-                vae=vae,
-                loras=loras
-            )
-        else:
-            return empty_meta()
+    def get_or_extract(self, path):
+        """Cache-ből, vagy extract_prompts + mentés."""
+        try:
+            stat = self._stat(path)
+        except OSError:
+            return extract_prompts(path)
+        meta = self.get(path, stat)
+        if meta is None:
+            meta = extract_prompts(path)
+            if meta.prompt != "Error":
+                try:
+                    self.put(path, meta, stat)
+                except sqlite3.Error as e:
+                    # a cache írás hibája (tele lemez, zárolás) ne vigye el a kész metaadatot
+                    debug_log(f"[ERROR] meta index put {path}: ({e})")
+        return meta
+
+    def load_many(self, paths, extract_missing=True):
+        """
+        Egy mappa (vagy bármilyen fájllista) összes metaadata: {path: ImageMeta}.
+        A cache-ben lévőket egy lekérdezéssel adja vissza, a hiányzókat parse-olja és elmenti.
+        """
+        paths = list(paths)
+        stats = {}
+        for p in paths:
+            try:
+                stats[p] = self._stat(p)
+            except OSError:
+                pass
+        result = {}
+        with self._lock:
+            for i in range(0, len(paths), 500):   # SQLite változószám limit
+                chunk = paths[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT path, size, mtime_ns, data FROM meta WHERE version=? AND path IN ({marks})",
+                    (META_PARSER_VERSION, *chunk)
+                ).fetchall()
+                for path, size, mtime_ns, data in rows:
+                    if stats.get(path) == (size, mtime_ns):
+                        try:
+                            result[path] = meta_from_json(data)
+                        except Exception:
+                            pass
+        if extract_missing:
+            fresh = []
+            for p in paths:
+                if p not in result and p in stats:
+                    meta = extract_prompts(p)
+                    result[p] = meta
+                    if meta.prompt != "Error":
+                        fresh.append((p, stats[p], meta))
+            try:
+                self.put_many(fresh)
+            except sqlite3.Error as e:
+                debug_log(f"[ERROR] meta index put: ({e})")
+        return result
 
-    elif ext in (".jpg", ".jpeg"):
-        return extract_prompts_jpg(fname)
-    else:
-        return empty_meta()
+    @staticmethod
+    def _fts_query(text):
+        """
+        Beírt szöveg -> FTS5 lekérdezés. Minden szó prefix keresés (ÉS kapcsolat),
+        "idézőjeles rész" = kifejezés, mező:szó = csak abban a mezőben (pl. model:sdxl).
+        """
+        parts = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+            column = None
+            if word:
+                field, sep, rest = word.partition(":")
+                if sep and field in SEARCH_FIELDS:
+                    column, word = field, rest
+            terms = [phrase] if phrase else re.findall(r"\w+", word)
+            for term in terms:
+                if not term.strip():
+                    continue
+                term = '"' + term.replace('"', '""') + '"' + ("" if phrase else "*")
+                parts.append(f"{column} : {term}" if column else term)
+        return " AND ".join(parts)
+
+    def search(self, text):
+        """
+        A keresésnek megfelelő path-ok halmaza (az index összes mappájából).
+        None, ha a szövegből nem lesz keresés (pl. "++" vagy egy nyitó idézőjel).
+        """
+        with self._lock:
+            if self.fts:
+                query = self._fts_query(text)
+                if not query:
+                    return None
+                try:
+                    rows = self._db.execute(
+                        "SELECT m.path FROM meta_fts JOIN meta m ON m.rowid = meta_fts.rowid"
+                        " WHERE meta_fts MATCH ? AND m.version = ?",
+                        (query, META_PARSER_VERSION)
+                    ).fetchall()
+                except sqlite3.OperationalError as e:
+                    debug_log(f"[ERROR] search {query!r}: ({e})")
+                    return set()
+            else:
+                words = text.split()
+                if not words:
+                    return None
+                where = " AND ".join("data LIKE ?" for _ in words)
+                rows = self._db.execute(
+                    f"SELECT path FROM meta WHERE version = ? AND {where}",
+                    (META_PARSER_VERSION, *[f"%{w}%" for w in words])
+                ).fetchall()
+        return {r[0] for r in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ---------- thumbnail lemez cache (egyetlen SQLite fájl, méretkorlátos LRU) ----------
+class ThumbStore:
+    """
+    Kész thumbnail-ek (kódolt PNG bájtok) tartósan, munkamenetek között.
+    Kulcs: path + mtime_ns + fájlméret. Ha az összméret túllépi a korlátot,
+    a legrégebben használt bejegyzések törlődnek.
+    """
+
+    def __init__(self, db_path=None, max_bytes=256 * 1024 * 1024):
+        if db_path is None:
+            try:
+                db_path = os.path.join(mapic_cache_dir(), "thumbs.sqlite3")
+            except OSError as e:
+                debug_log(f"[ERROR] thumb cache dir: ({e}), using memory")
+                db_path = ":memory:"
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._db = open_cache_db(db_path, self._setup, "thumb cache")
+
+    def _setup(self, db):
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS thumbs ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,"
+            " nbytes INTEGER, last_used INTEGER, data BLOB)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS thumbs_lru ON thumbs(last_used)")
+        db.commit()
+        self._total = db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM thumbs").fetchone()[0]
+
+    @staticmethod
+    def _stat(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get_many(self, paths):
+        """{path: bytes} az érvényes (mtime + méret egyezik) bejegyzésekre, egy menetben."""
+        paths = list(paths)
+        stats = {}
+        for p in paths:
+            try:
+                stats[p] = self._stat(p)
+            except OSError:
+                pass
+        result = {}
+        now = time.time_ns()
+        with self._lock:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT path, mtime_ns, size, data FROM thumbs WHERE path IN ({marks})", chunk
+                ).fetchall()
+                for path, mtime_ns, size, data in rows:
+                    if stats.get(path) == (mtime_ns, size):
+                        result[path] = data
+            if result:
+                self._db.executemany("UPDATE thumbs SET last_used=? WHERE path=?",
+                                     [(now, p) for p in result])
+                self._db.commit()
+        return result
+
+    def put(self, path, data):
+        try:
+            mtime_ns, size = self._stat(path)
+        except OSError:
+            return
+        with self._lock:
+            total = self._total
+            try:
+                old = self._db.execute("SELECT nbytes FROM thumbs WHERE path=?", (path,)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO thumbs VALUES (?, ?, ?, ?, ?, ?)",
+                                 (path, mtime_ns, size, len(data), time.time_ns(), sqlite3.Binary(data)))
+                self._total += len(data) - (old[0] if old else 0)
+                if self._total > self.max_bytes:
+                    self._evict()
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                self._total = total
+                raise
+
+    def _evict(self):
+        # 90%-ig takarítunk, hogy ne fusson le minden put után
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute("SELECT path, nbytes FROM thumbs ORDER BY last_used").fetchall()
+        drop = []
+        for path, nbytes in rows:
+            if self._total <= target:
+                break
+            drop.append((path,))
+            self._total -= nbytes
+        self._db.executemany("DELETE FROM thumbs WHERE path=?", drop)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
 
 def is_system_dark():
     palette = QApplication.palette()
@@ -532,6 +453,1032 @@ def is_system_dark():
     # ha a háttér sötétebb mint a szöveg → dark mode
     return bg_color.lightness() < text_color.lightness()
     
+# ---------- thumbnail készítés Pillow-val (kicsiben dekódolva) ----------
+THUMB_SIZE = (160, 120)
+
+def to_8bit_gray(img):
+    """
+    16 bites / egész / lebegőpontos szürke kép (pl. depth map) -> "L". A reduce()
+    az I;16 módot nem kezeli; a 0-255-ön kívüli értékeket a tartományra skálázzuk.
+    """
+    if img.mode.startswith("I;16"):
+        img = img.convert("I")
+    lo, hi = img.getextrema()
+    if lo < 0 or hi > 255:
+        scale = 255.0 / (hi - lo) if hi > lo else 1.0
+        img = img.point(lambda v: (v - lo) * scale)
+    return img.convert("L")
+
+def render_thumbnail(path, size=THUMB_SIZE):
+    """
+    Kis méretű PIL kép a teljes felbontás dekódolása nélkül:
+    JPEG-nél draft() (DCT skálázás), máshol reduce() a reducing_gap-en át.
+    """
+    from PIL import Image   # csak az első thumbnail-nél töltődik be (gyorsabb indulás)
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", size)
+        if img.mode.startswith("I;16") or img.mode in ("I", "F"):
+            img = to_8bit_gray(img)
+        img.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        if img.mode not in ("RGB", "RGBA"):
+            has_alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        else:
+            img.load()
+        return img
+
+def pil_to_qimage(img):
+    """
+    RGB/RGBA PIL kép -> QImage. Két másolás: tobytes(), majd copy(), mert a QImage
+    nem veszi át a Python bytes puffert - így a kép a jelben biztonságosan utazhat.
+    """
+    data = img.tobytes()
+    w, h = img.size
+    if img.mode == "RGBA":
+        qimg = QImage(data, w, h, w * 4, QImage.Format.Format_RGBA8888)
+    else:
+        qimg = QImage(data, w, h, w * 3, QImage.Format.Format_RGB888)
+    return qimg.copy()
+
+def pil_to_png(img):
+    """PIL thumbnail -> PNG bájtok (a lemez cache-hez)."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG", compress_level=1)
+    return buf.getvalue()
+
+# ---------- háttér feladatok generációja ----------
+class JobGeneration:
+    """
+    Szálbiztos generáció számláló. Minden új mappa betöltés új ID-t kap;
+    a feladatok és eredmények magukkal viszik az ID-t, a régieket eldobjuk.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = Lock()
+
+    def next(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+    @property
+    def current(self):
+        return self._value
+
+    def is_current(self, gen):
+        return gen == self._value
+
+# ---------- thumbnail munkasor (prioritás + átrangsorolás) ----------
+PRIO_CONTROL = -1       # batch / leállítás
+PRIO_VISIBLE = 0        # a rács látható része
+PRIO_NEAR = 1           # egy képernyőnyi fölötte és alatta
+PRIO_BACKGROUND = 2     # minden más
+
+class ThumbQueue:
+    """
+    Blokkoló prioritásos sor (kisebb szám = előbb). A path-hoz kötött feladatok
+    prioritása menet közben módosítható: az új bejegyzés felülírja a régit,
+    az elavult heap elemeket kivételkor eldobjuk.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._rank = {}                 # key -> (prio, seq) az érvényes bejegyzéshez
+        self._jobs = {}                 # key -> feladat
+        self._seq = itertools.count()
+        self._cond = Condition()
+
+    def put(self, job, prio, key=None):
+        with self._cond:
+            seq = next(self._seq)
+            if key is not None:
+                self._rank[key] = (prio, seq)
+                self._jobs[key] = job
+            heapq.heappush(self._heap, (prio, seq, key, job))
+            self._cond.notify()
+
+    def rerank(self, keys, prio):
+        """A még sorban álló kulcsok prioritásának átállítása."""
+        with self._cond:
+            for key in keys:
+                entry = self._rank.get(key)
+                if entry is None or entry[0] == prio:
+                    continue
+                seq = next(self._seq)
+                self._rank[key] = (prio, seq)
+                heapq.heappush(self._heap, (prio, seq, key, self._jobs[key]))
+            # az elavult elemek ne nőjenek a végtelenségig
+            if len(self._heap) > 2 * len(self._rank) + 1000:
+                self._heap = [e for e in self._heap if e[2] is None or self._rank.get(e[2]) == (e[0], e[1])]
+                heapq.heapify(self._heap)
+
+    def get(self):
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+                prio, seq, key, job = heapq.heappop(self._heap)
+                if key is None:
+                    return job
+                if self._rank.get(key) == (prio, seq):
+                    del self._rank[key]
+                    del self._jobs[key]
+                    return job
+
+    def clear(self):
+        """Minden feladat eldobása (a leállítás jelek maradnak)."""
+        with self._cond:
+            self._heap = [e for e in self._heap if e[3] is None]
+            heapq.heapify(self._heap)
+            self._rank.clear()
+            self._jobs.clear()
+
+# ---------- thumbnail worker pool ----------
+# worker szálak száma; MAPIC_THUMB_WORKERS környezeti változóval felülírható
+THUMB_WORKERS = int(os.environ.get("MAPIC_THUMB_WORKERS", "0")) or max(2, (os.cpu_count() or 2) - 1)
+
+class ThumbnailLoader(QObject):
+    """
+    Thumbnail készítés több worker szálon (a Pillow dekódolás elengedi a GIL-t).
+    A szálak csak QImage-et gyártanak; a QPixmap a GUI szálon készül
+    a thumb_ready jel fogadásakor. A munka sorrendje: látható -> közeli -> többi.
+    """
+    thumb_ready = pyqtSignal(int, str, QImage)   # generation, path, thumbnail
+
+    def __init__(self, store, workers=THUMB_WORKERS):
+        super().__init__()
+        self.store = store
+        self.generation = JobGeneration()
+        self._queue = ThumbQueue()
+        self._pending = set()               # ebben a generációban már sorba tett / kész path-ok
+        self._pending_lock = Lock()
+        self._elevated = set()              # jelenleg VISIBLE / NEAR prioritású path-ok
+        self._threads = [Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    def extend(self, paths):
+        """
+        Újabb fájlok a futó generációhoz (pl. mappa olvasás közben): előbb a lemez
+        cache, a hiányzók mennek a workerekhez.
+        """
+        paths = list(paths)
+        if paths:
+            self._queue.put(("batch", self.generation.current, paths), PRIO_CONTROL)
+
+    def _enqueue(self, gen, path, prio):
+        self._queue.put(("path", gen, path), prio, key=path)
+
+    def request(self, path):
+        """Egy thumbnail kérése igény szerint (a rács épp kirajzolná) -> látható prioritás."""
+        gen = self.generation.current
+        with self._pending_lock:
+            if path in self._pending:
+                self._queue.rerank([path], PRIO_VISIBLE)
+                self._elevated.add(path)
+                return
+            self._pending.add(path)
+        self._elevated.add(path)
+        self._enqueue(gen, path, PRIO_VISIBLE)
+
+    def prioritize(self, visible, near):
+        """
+        Görgetéskor: a látható és a közeli path-ok előre kerülnek,
+        a korábban kiemelt, de már nem látható elemek visszamennek a háttérbe.
+        """
+        # listák maradnak, hogy a sorrend (fentről lefelé) megmaradjon
+        elevated = set(visible)
+        near = [p for p in near if p not in elevated]
+        elevated.update(near)
+        self._queue.rerank([p for p in self._elevated if p not in elevated], PRIO_BACKGROUND)
+        self._queue.rerank(near, PRIO_NEAR)
+        self._queue.rerank(visible, PRIO_VISIBLE)
+        self._elevated = elevated
+
+    def add(self, paths):
+        """Új fájlok a futó generációhoz (háttér prioritással)."""
+        gen = self.generation.current
+        for path in paths:
+            with self._pending_lock:
+                if path in self._pending:
+                    continue
+                self._pending.add(path)
+            self._enqueue(gen, path, PRIO_BACKGROUND)
+
+    def forget(self, path):
+        """Megváltozott / törölt fájl: a következő kérésre újra elkészül."""
+        with self._pending_lock:
+            self._pending.discard(path)
+
+    def cancel(self):
+        """A sorban álló munka azonnali eldobása; a futó feladatok eredménye elavul."""
+        gen = self.generation.next()
+        with self._pending_lock:
+            self._pending.clear()
+        self._elevated = set()
+        self._queue.clear()
+        return gen
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            kind, gen, arg = job
+            if not self.generation.is_current(gen):
+                continue
+            try:
+                if kind == "batch":
+                    self._load_batch(gen, arg)
+                else:
+                    self._render(gen, arg)
+            except Exception as e:
+                debug_log(f"[ERROR] thumbnail worker {arg if kind == 'path' else ''}: ({e})")
+
+    def _load_batch(self, gen, paths):
+        try:
+            stored = self.store.get_many(paths)
+        except sqlite3.Error as e:
+            debug_log(f"[ERROR] thumb cache get: ({e})")
+            stored = {}     # mind renderelésre megy
+        for path in paths:
+            if not self.generation.is_current(gen):
+                return
+            with self._pending_lock:
+                if path in self._pending:   # már kérte valaki
+                    continue
+                self._pending.add(path)
+            data = stored.get(path)
+            if data is not None:
+                qimg = QImage.fromData(data)
+                if not qimg.isNull():
+                    self.thumb_ready.emit(gen, path, qimg)
+                    continue
+            self._enqueue(gen, path, PRIO_NEAR if path in self._elevated else PRIO_BACKGROUND)
+
+    def _render(self, gen, path):
+        # a lemez cache csak gyorsítás: olvasási / írási hibája nem tarthatja vissza a thumbnailt
+        try:
+            data = self.store.get_many([path]).get(path)
+        except sqlite3.Error as e:
+            debug_log(f"[ERROR] thumb cache get {path}: ({e})")
+            data = None
+        if data is not None:
+            qimg = QImage.fromData(data)
+            if not qimg.isNull():
+                self.thumb_ready.emit(gen, path, qimg)
+                return
+        img = render_thumbnail(path)
+        if self.generation.is_current(gen):
+            self.thumb_ready.emit(gen, path, pil_to_qimage(img))
+        try:
+            self.store.put(path, pil_to_png(img))
+        except sqlite3.Error as e:
+            debug_log(f"[ERROR] thumb cache put {path}: ({e})")
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._queue.put(None, PRIO_CONTROL)
+        for t in self._threads:
+            t.join(timeout=1)
+
+# ---------- képernyő felbontású dekódolás ----------
+# True: a nagy nézet csak a címke méretéig dekódol, teljes felbontás csak 1:1 nagyításnál
+SCREEN_RES_DECODE = True
+
+def read_image_scaled(path, max_w=0, max_h=0):
+    """
+    Kép beolvasása QImageReader-rel. Ha max_w / max_h adott, a legnagyobb olyan
+    2-hatvány kicsinyítésre dekódol, ami még nem kisebb a kijelzett méretnél
+    (JPEG-nél a dekóder maga skáláz). Visszatér: (QImage, eredeti QSize).
+    """
+    reader = QImageReader(path)
+    full = reader.size()
+    if max_w > 0 and max_h > 0 and full.isValid() and not full.isEmpty():
+        shown = min(max_w / full.width(), max_h / full.height())
+        factor = 1
+        while shown > 0 and factor * 2 <= 1 / shown:
+            factor *= 2
+        if factor > 1:
+            reader.setScaledSize(QSize(max(1, full.width() // factor), max(1, full.height() // factor)))
+    img = reader.read()
+    if not full.isValid():
+        full = img.size()
+    return img, full
+
+def decoded_enough(decoded, full, max_w, max_h):
+    """Elég nagy-e a dekódolt kép a (max_w, max_h) dobozba illesztéshez."""
+    if max_w <= 0 or max_h <= 0 or decoded.width() >= full.width():
+        return True
+    need = full.scaled(QSize(max_w, max_h), Qt.AspectRatioMode.KeepAspectRatio)
+    return decoded.width() >= need.width() and decoded.height() >= need.height()
+
+# ---------- előtöltés a következő / előző képekhez ----------
+PREFETCH_BUDGET = 384 * 1024 * 1024    # dekódolt képek max. memóriája (bájt)
+PREFETCH_MIN = 2                        # ennyit töltünk előre nyugodt lapozásnál
+PREFETCH_MAX = 8                        # gyors lapozásnál legfeljebb ennyit
+
+class ImagePrefetcher:
+    """
+    A current_index körüli képeket háttérszálakon dekódolja (QImage) és a
+    metaadatukat is előre kiolvassa. Az ablak mérete a lapozás irányától és
+    sebességétől függ; a tárolt képek összmérete PREFETCH_BUDGET alatt marad.
+    """
+
+    def __init__(self, meta_index, budget=PREFETCH_BUDGET, workers=2):
+        self.meta_index = meta_index
+        self.budget = budget
+        self._cache = OrderedDict()     # path -> (QImage, eredeti QSize, ImageMeta)
+        self._target = (0, 0)           # dekódolási célméret (0 = teljes felbontás)
+        self._bytes = 0
+        self._todo = []                 # a legközelebbi elöl
+        self._wanted = {}               # path -> távolság a current_index-től
+        self._inflight = set()
+        self._cond = Condition()
+        self._stop = False
+        self._threads = [Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    def take(self, path):
+        """Előtöltött (QImage, eredeti QSize, ImageMeta) vagy None."""
+        with self._cond:
+            return self._cache.get(path)
+
+    def update(self, files, index, direction=1, rate=0.0, target=(0, 0)):
+        """
+        Új pozíció: direction = +1 / -1 (lapozás iránya), rate = lapozás / másodperc,
+        target = dekódolási célméret. Gyorsabb lapozásnál messzebbre töltünk előre,
+        visszafelé kevesebbet.
+        """
+        ahead = int(min(PREFETCH_MAX, max(PREFETCH_MIN, PREFETCH_MIN + rate)))
+        behind = 1 if rate > 2 else PREFETCH_MIN
+        wanted = {}
+        for dist in range(1, max(ahead, behind) + 1):
+            for step, limit in ((direction, ahead), (-direction, behind)):
+                i = index + step * dist
+                if dist <= limit and 0 <= i < len(files):
+                    wanted.setdefault(files[i], dist)
+        with self._cond:
+            if target != self._target:      # más méret kell -> a régiek nem jók
+                self._target = target
+                self._cache.clear()
+                self._bytes = 0
+            self._wanted = wanted
+            self._todo = [p for p in sorted(wanted, key=wanted.get)
+                          if p not in self._cache and p not in self._inflight]
+            self._evict()
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self._cache.clear()
+            self._bytes = 0
+            self._todo = []
+            self._wanted = {}
+
+    def forget(self, path):
+        with self._cond:
+            entry = self._cache.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry[0].sizeInBytes()
+
+    def _evict(self):
+        # előbb a már nem kellő képek (legrégebbi elöl), aztán a legtávolabbiak
+        while self._bytes > self.budget and self._cache:
+            victim = next((p for p in self._cache if p not in self._wanted), None)
+            if victim is None:
+                victim = max(self._cache, key=lambda p: self._wanted.get(p, 0))
+            qimg, _full, _meta = self._cache.pop(victim)
+            self._bytes -= qimg.sizeInBytes()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._todo and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                path = self._todo.pop(0)
+                target = self._target
+                self._inflight.add(path)
+            try:
+                qimg, full = read_image_scaled(path, *target)
+                meta = self.meta_index.get_or_extract(path)
+            except Exception as e:
+                debug_log(f"[ERROR] prefetch {path}: ({e})")
+                qimg = None
+            with self._cond:
+                self._inflight.discard(path)
+                if (qimg is not None and not qimg.isNull() and path in self._wanted
+                        and target == self._target):
+                    self._cache[path] = (qimg, full, meta)
+                    self._bytes += qimg.sizeInBytes()
+                    self._evict()
+
+    def shutdown(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1)
+
+# ---------- metaadat kinyerés háttérszálon ----------
+class MetaLoader(QObject):
+    """
+    Egy worker szál, ami mindig csak a legutóbb kért kép metaadatát készíti el
+    (a közben átlépett képek kérései elvesznek). Az eredmény a meta_ready jellel
+    jut vissza a GUI szálra, a generációval együtt.
+    """
+    meta_ready = pyqtSignal(int, str, object)   # generation, path, ImageMeta
+
+    def __init__(self, meta_index):
+        super().__init__()
+        self.meta_index = meta_index
+        self.generation = JobGeneration()
+        self._next = None
+        self._stop = False
+        self._cond = Condition()
+        self._thread = Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def request(self, path):
+        gen = self.generation.next()
+        with self._cond:
+            self._next = (gen, path)
+            self._cond.notify()
+        return gen
+
+    def cancel(self):
+        self.generation.next()
+        with self._cond:
+            self._next = None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._next is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                gen, path = self._next
+                self._next = None
+            if not self.generation.is_current(gen):
+                continue
+            try:
+                result = self.meta_index.get_or_extract(path)
+            except Exception as e:
+                debug_log(f"[ERROR] extract_prompts({path}): {e}")
+                result = empty_meta()._replace(prompt=f"Error: {e}")
+            if self.generation.is_current(gen):
+                self.meta_ready.emit(gen, path, result)
+
+    def shutdown(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout=1)
+
+# ---------- keresőindex építése háttérben ----------
+class MetaIndexer(QObject):
+    """
+    A megnyitott mappa minden képét végigparse-olja (MetaIndex.load_many), így a
+    keresőindex a böngészéstől függetlenül felépül. Egy szál, adagokban dolgozik;
+    új mappánál új generáció, a régi sor eldobódik.
+    """
+    progress = pyqtSignal(int, int, int)    # generation, kész, összes
+    indexed = pyqtSignal(int, object)       # generation, {path: ImageMeta} (egy adag)
+
+    def __init__(self, meta_index, chunk=64):
+        super().__init__()
+        self.meta_index = meta_index
+        self.chunk = chunk
+        self.generation = JobGeneration()
+        self._queue = deque()
+        self._done = 0
+        self._total = 0
+        self._stop = False
+        self._cond = Condition()
+        self._thread = Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def index(self, paths=()):
+        """Új mappa: a korábbi sor törlődik."""
+        with self._cond:
+            gen = self.generation.next()
+            self._queue.clear()
+            self._done = self._total = 0
+        self.add(paths)
+        return gen
+
+    def add(self, paths):
+        paths = list(paths)
+        if not paths:
+            return
+        with self._cond:
+            self._queue.extend(paths)
+            self._total += len(paths)
+            self._cond.notify()
+
+    def cancel(self):
+        self.index()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                gen = self.generation.current
+                batch = [self._queue.popleft() for _ in range(min(self.chunk, len(self._queue)))]
+            try:
+                metas = self.meta_index.load_many(batch)
+            except Exception as e:
+                debug_log(f"[ERROR] meta indexer: ({e})")
+                metas = {}
+            with self._cond:
+                if not self.generation.is_current(gen):
+                    continue
+                self._done += len(batch)
+                done, total = self._done, self._total
+            if metas:
+                self.indexed.emit(gen, metas)
+            self.progress.emit(gen, done, total)
+
+    def shutdown(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout=1)
+
+# ---------- facet szűrés (memóriában, mezőnként: érték -> path-ok) ----------
+FACET_FIELDS = (
+    ("model", "Model"),
+    ("sampler", "Sampler"),
+    ("scheduler", "Scheduler"),
+    ("loras", "LoRA"),
+    ("steps", "Steps"),
+    ("cfg_scale", "CFG"),
+)
+FACET_NONE = "(none)"
+
+def facet_values(meta, field):
+    """Egy ImageMeta mező értékei facet-ként (a LoRA több értékű)."""
+    if field == "loras":
+        loras = meta.loras if isinstance(meta.loras, (list, tuple)) else []
+        names = {str(l[0] if isinstance(l, (list, tuple)) else l) for l in loras}
+        return names or {FACET_NONE}
+    value = str(getattr(meta, field)).strip()
+    return {FACET_NONE if value in ("", "-", "no", "N/A") else value}
+
+class FacetIndex:
+    """
+    A mappa metaadatai oszloponként: mező -> érték -> path-ok halmaza.
+    Szűrés: egy mezőn belül VAGY, mezők között ÉS. A darabszámok mezőnként a
+    többi mező kijelölését (és a keresést) veszik figyelembe - csak halmaz
+    műveletek, fájlt nem olvas.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._postings = {field: {} for field, _ in FACET_FIELDS}
+        self._rows = {}     # path -> {mező: értékek}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, metas):
+        """metas: {path: ImageMeta}; a már bent lévő path-ok értékei cserélődnek."""
+        for path, meta in metas.items():
+            self.remove(path)
+            row = {}
+            for field, _ in FACET_FIELDS:
+                values = facet_values(meta, field)
+                row[field] = values
+                for v in values:
+                    self._postings[field].setdefault(v, set()).add(path)
+            self._rows[path] = row
+
+    def remove(self, path):
+        row = self._rows.pop(path, None)
+        if row is None:
+            return
+        for field, values in row.items():
+            postings = self._postings[field]
+            for v in values:
+                paths = postings.get(v)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del postings[v]
+
+    def _matches(self, selected):
+        """mező -> a kijelölt értékek bármelyikével rendelkező path-ok."""
+        postings = self._postings
+        return {
+            field: set().union(*(postings[field].get(v, ()) for v in values))
+            for field, values in selected.items() if values
+        }
+
+    def filter(self, selected):
+        """A kijelölésnek megfelelő path-ok halmaza (selected: mező -> értékek halmaza)."""
+        matches = list(self._matches(selected).values())
+        if not matches:
+            return set(self._rows)
+        return set.intersection(*matches)
+
+    def counts(self, selected, base=None):
+        """mező -> {érték: darab}; base: további megszorítás (pl. keresési találatok)."""
+        matches = self._matches(selected)
+        result = {}
+        for field, _ in FACET_FIELDS:
+            others = [m for f, m in matches.items() if f != field]
+            if base is not None:
+                others.append(base)
+            postings = self._postings[field]
+            if not others:
+                result[field] = {v: len(paths) for v, paths in postings.items()}
+                continue
+            allowed = set.intersection(*sorted(others, key=len))
+            result[field] = {v: len(paths & allowed) for v, paths in postings.items()}
+        return result
+
+# ---------- rendezett fájllista O(1) path -> index kereséssel ----------
+class FileList:
+    """
+    Rendezett path lista, mellette path -> index szótár. Beszúrás / törlés után
+    a szótár csak a következő get_index / index híváskor épül újra (egyszer egy
+    változás-sorozat után); addig a tagság és a sor bisect-tel, O(log n)-ben jön,
+    így egy k elemes változás-sorozat O(k log n) + egy O(n) újraépítés.
+    """
+
+    def __init__(self, paths=()):
+        self._items = sorted(paths)
+        self._index = None
+
+    def _map(self):
+        if self._index is None:
+            self._index = {p: i for i, p in enumerate(self._items)}
+        return self._index
+
+    def find(self, path):
+        """Sor index vagy -1, a szótár újraépítése nélkül."""
+        if self._index is not None:
+            return self._index.get(path, -1)
+        row = bisect.bisect_left(self._items, path)
+        if row < len(self._items) and self._items[row] == path:
+            return row
+        return -1
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, path):
+        return self.find(path) >= 0
+
+    def __eq__(self, other):
+        if isinstance(other, FileList):
+            return self._items == other._items
+        return self._items == list(other)
+
+    def index(self, path):
+        i = self._map().get(path)
+        if i is None:
+            raise ValueError(f"{path} is not in list")
+        return i
+
+    def get_index(self, path, default=-1):
+        return self._map().get(path, default)
+
+    def insert(self, path):
+        """Rendezett beszúrás; visszatér a sor indexével (None, ha már bent volt)."""
+        row = bisect.bisect_left(self._items, path)
+        if row < len(self._items) and self._items[row] == path:
+            return None
+        self._items.insert(row, path)
+        self._index = None
+        return row
+
+    def remove(self, path):
+        """Törlés; visszatér a sor indexével (None, ha nem volt bent)."""
+        row = self.find(path)
+        if row < 0:
+            return None
+        del self._items[row]
+        self._index = None
+        return row
+
+    def merge(self, paths):
+        """Rendezett adag összefésülése O(n)-ben; visszatér az új (még nem szereplő) path-okkal."""
+        new = [p for p in sorted(paths) if p not in self]
+        if new:
+            self._items = list(heapq.merge(self._items, new))
+            self._index = None
+        return new
+
+    def remove_many(self, paths):
+        gone = set(paths)
+        if any(p in self for p in gone):
+            self._items = [p for p in self._items if p not in gone]
+            self._index = None
+
+# ---------- mappa beolvasás és figyelés ----------
+# könyvtár módban ennyi almappát listázunk párhuzamosan
+SCAN_WORKERS = 4
+
+class FolderScanner(QObject):
+    """
+    Mappa listázás háttérszálon, darabokban: az első (kicsi) adag azonnal megy,
+    hogy az első kép a listázás vége előtt megjelenhessen; lassú (hálózati)
+    mappánál idő alapján is küldünk. Minden listázás saját generációt kap.
+    Rekurzív (könyvtár) módban az almappákat párhuzamosan listázzuk, és az
+    elkészült almappák képeit ugyanígy, adagokba összevonva küldjük.
+    """
+    batch_ready = pyqtSignal(int, list)         # generation, rendezett path lista
+    finished = pyqtSignal(int, list, dict)      # generation, mappák, {path: (size, mtime_ns)}
+
+    def __init__(self, batch_size=1000, first_batch=32, max_delay=0.1, parent=None):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self.first_batch = first_batch
+        self.max_delay = max_delay
+        self.generation = JobGeneration()
+
+    def scan(self, folder, recursive=False):
+        gen = self.generation.next()
+        target = self._run_tree if recursive else self._run
+        Thread(target=target, args=(gen, folder), daemon=True).start()
+        return gen
+
+    def cancel(self):
+        self.generation.next()
+
+    def _run(self, gen, folder):
+        known = {}
+        batch = []
+        limit = self.first_batch
+        last = time.monotonic()
+        try:
+            for path, size, mtime_ns in iter_images(folder):
+                if not self.generation.is_current(gen):
+                    return
+                known[path] = (size, mtime_ns)
+                batch.append(path)
+                if len(batch) >= limit or time.monotonic() - last > self.max_delay:
+                    self.batch_ready.emit(gen, sorted(batch))
+                    batch = []
+                    limit = self.batch_size
+                    last = time.monotonic()
+        except OSError as e:
+            debug_log(f"[ERROR] scan {folder}: ({e})")
+        if not self.generation.is_current(gen):
+            return
+        if batch:
+            self.batch_ready.emit(gen, sorted(batch))
+        self.finished.emit(gen, [folder], known)
+
+    @staticmethod
+    def _list_dir(folder):
+        subdirs = []
+        try:
+            images = {path: (size, mtime_ns) for path, size, mtime_ns in iter_images(folder, subdirs)}
+        except OSError as e:
+            debug_log(f"[ERROR] scan {folder}: ({e})")
+            images = {}
+        return folder, images, subdirs
+
+    def _run_tree(self, gen, root):
+        known = {}
+        folders = []
+        batch = []
+        limit = self.first_batch
+        last = time.monotonic()
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+            futures = {pool.submit(self._list_dir, root)}
+            while futures:
+                done, futures = wait_futures(futures, return_when=FIRST_COMPLETED)
+                if not self.generation.is_current(gen):
+                    for f in futures:
+                        f.cancel()
+                    return
+                for f in done:
+                    folder, images, subdirs = f.result()
+                    folders.append(folder)
+                    known.update(images)
+                    batch.extend(images)
+                    for d in subdirs:
+                        futures.add(pool.submit(self._list_dir, d))
+                # az almappák eredményét összevonjuk, mint _run-ban: sok kis mappa
+                # se jelentsen mappánként egy GUI oldali merge-et
+                if batch and (len(batch) >= limit or time.monotonic() - last > self.max_delay):
+                    self.batch_ready.emit(gen, sorted(batch))
+                    batch = []
+                    limit = self.batch_size
+                    last = time.monotonic()
+        if not self.generation.is_current(gen):
+            return
+        if batch:
+            self.batch_ready.emit(gen, sorted(batch))
+        self.finished.emit(gen, folders, known)
+
+class FolderWatcher(QObject):
+    """
+    QFileSystemWatcher a megnyitott mappá(k)ra. A változás jelek sorozatát
+    összevonjuk (debounce, legfeljebb delay_ms várakozással), majd háttérszálon
+    csak a jelzett mappákat listázzuk újra, és egy összehasonlítással
+    (név + méret + mtime) kiszámoljuk, mi jött, ment vagy módosult - a teljes
+    újratöltés helyett.
+    """
+    changed = pyqtSignal(list, list, list)   # added, removed, modified
+    _rescanned = pyqtSignal(int, dict, list, list, list)    # generation, {mappa: listázás}, added, removed, modified
+
+    def __init__(self, delay_ms=400, parent=None):
+        super().__init__(parent)
+        self.folders = []
+        self._known = {}                # mappa -> {path: (size, mtime_ns)}
+        self._dirty = set()
+        self._busy = False              # fut-e háttér újralistázás
+        self.generation = JobGeneration()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_dir_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._rescan)
+        self._rescanned.connect(self._on_rescanned)
+
+    def watch(self, folders, known=None):
+        """
+        folders: egy mappa vagy mappák listája (None = figyelés vége).
+        known: {path: (size, mtime_ns)} ha a listázás már megvan (FolderScanner).
+        """
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self._timer.stop()
+        self._dirty.clear()
+        self._busy = False
+        self.generation.next()          # a futó újralistázás eredménye elavul
+        if not folders:
+            folders = []
+        elif isinstance(folders, str):
+            folders = [folders]
+        self.folders = list(folders)
+        self._known = {f: {} for f in self.folders}
+        if known is None:
+            for f in self.folders:
+                self._known[f] = self._scan(f)
+        else:
+            for path, st in known.items():
+                self._known.setdefault(os.path.dirname(path), {})[path] = st
+        if self.folders:
+            self._watcher.addPaths(self.folders)
+
+    @staticmethod
+    def _scan(folder):
+        try:
+            return {path: (size, mtime_ns) for path, size, mtime_ns in iter_images(folder)}
+        except OSError as e:
+            debug_log(f"[ERROR] folder watch {folder}: ({e})")
+            return {}
+
+    def _on_dir_changed(self, path):
+        # egy renderelés több jelet is adhat -> összevonjuk; a futó időzítőt nem
+        # indítjuk újra, így folyamatos írás mellett is delay_ms-enként frissül
+        self._dirty.add(path)
+        if not self._timer.isActive() and not self._busy:
+            self._timer.start()
+
+    def _rescan(self):
+        if not self._dirty:
+            return
+        old = {folder: self._known.get(folder, {}) for folder in self._dirty}
+        self._dirty.clear()
+        self._busy = True
+        Thread(target=self._run, args=(self.generation.current, old), daemon=True).start()
+
+    def _run(self, gen, old):
+        # háttérszál: listázás + stat, a GUI szál csak az eredményt kapja
+        added, removed, modified, listed = [], [], [], {}
+        for folder, known in old.items():
+            now = self._scan(folder)
+            added += [p for p in now if p not in known]
+            removed += [p for p in known if p not in now]
+            modified += [p for p in now if p in known and now[p] != known[p]]
+            listed[folder] = now
+        self._rescanned.emit(gen, listed, added, removed, modified)
+
+    def _on_rescanned(self, gen, listed, added, removed, modified):
+        if not self.generation.is_current(gen):
+            return
+        self._busy = False
+        self._known.update(listed)
+        if self._dirty:
+            self._timer.start()     # futás közben jött változás
+        if added or removed or modified:
+            self.changed.emit(added, removed, modified)
+
+# ---------- virtualizált thumbnail rács (model/view) ----------
+class ThumbModel(QAbstractListModel):
+    """
+    A mappa fájllistája modellként. A view csak a látható sorokra kér adatot;
+    ha egy thumbnail még nincs kész, a thumb_needed jellel kérjük le.
+    """
+    thumb_needed = pyqtSignal(str)
+
+    def __init__(self, thumb_cache, parent=None):
+        super().__init__(parent)
+        self.thumb_cache = thumb_cache      # path -> QPixmap (az ImageViewer-é)
+        self.files = FileList()
+        self.root = None                    # könyvtár módban a gyökér (relatív tooltiphez)
+
+    def set_files(self, files):
+        self.beginResetModel()
+        self.files = FileList(files)
+        self.endResetModel()
+
+    def apply_changes(self, added, removed):
+        """Fájlok be- és kiléptetése a rendezett listába, modell reset nélkül."""
+        # find() / bisect: a path -> index szótár csak a sorozat után épül újra
+        for path in removed:
+            row = self.files.find(path)
+            if row < 0:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.files.remove(path)
+            self.endRemoveRows()
+        for path in sorted(added):
+            if path in self.files:
+                continue
+            row = bisect.bisect_left(self.files, path)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.files.insert(path)
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.files[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            pix = self.thumb_cache.get(path)
+            if pix is None:
+                self.thumb_needed.emit(path)
+            return pix
+        if role == Qt.ItemDataRole.ToolTipRole and self.root:
+            return os.path.relpath(path, self.root)
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return os.path.basename(path)
+        if role == Qt.ItemDataRole.UserRole:
+            return path
+        return None
+
+    def thumb_updated(self, path):
+        row = self.files.get_index(path)
+        if row >= 0:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [Qt.ItemDataRole.DecorationRole])
+
+class ThumbDelegate(QStyledItemDelegate):
+    """Fix méretű cella: középre rajzolt thumbnail, vagy üres helykitöltő."""
+
+    def __init__(self, parent=None, size=THUMB_SIZE, pad=6):
+        super().__init__(parent)
+        self.size = size
+        self.pad = pad
+
+    def sizeHint(self, option, index):
+        return QSize(self.size[0] + 2 * self.pad, self.size[1] + 2 * self.pad)
+
+    def paint(self, painter, option, index):
+        rect = option.rect
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+        pix = index.data(Qt.ItemDataRole.DecorationRole)
+        if pix is None or pix.isNull():
+            w, h = self.size
+            painter.fillRect(rect.x() + (rect.width() - w) // 2, rect.y() + (rect.height() - h) // 2,
+                             w, h, option.palette.mid())
+            return
+        x = rect.x() + (rect.width() - pix.width()) // 2
+        y = rect.y() + (rect.height() - pix.height()) // 2
+        painter.drawPixmap(x, y, pix)
+
 class ToastMessage(QWidget):
     def __init__(self, parent, text, duration=1200):
         super().__init__(parent)
@@ -619,14 +1566,35 @@ class ImageViewer(QWidget):
         QShortcut(QKeySequence("Left"), self, self.show_prev)
         QShortcut(QKeySequence("Down"), self, self.show_next)
         QShortcut(QKeySequence("Up"), self, self.show_prev)
+        QShortcut(QKeySequence("Z"), self, self.toggle_zoom)   # 1:1 nagyítás ki/be
 
         self.setWindowTitle("MaPic - ImageView + AIMeta")
 
         # state
-        self.image_files = []
+        self.all_files = FileList()       # a mappa összes képe
+        self.image_files = self.all_files # a látható (keresés / szűrő utáni) lista: rács + lapozás
+        self._filters = {}                # név -> megengedett path-ok halmaza
+        self.facet_index = FacetIndex()   # a mappa metaadatai facet szűréshez
+        self._facet_sel = {}              # mező -> kijelölt értékek
+        self._search_show = False
+        self._index_progress = (0, 0)
         self.current_index = -1
         self.current_pixmap = None
+        self.current_file = None
+        self.current_full_size = QSize()
+        self._full_pixmap = None          # teljes felbontás, csak 1:1 nézethez
+        self.zoom_1to1 = False
+        self._scaled_cache = OrderedDict()  # (w, h) -> simán skálázott pixmap az aktuális képhez
+        self._rescale_timer = QTimer(self)   # átméretezés debounce
+        self._rescale_timer.setSingleShot(True)
+        self._rescale_timer.setInterval(150)
+        self._rescale_timer.timeout.connect(self._update_image_label)
+        self._auto_file = None
+        self.library_mode = False         # rekurzív, több mappás nézet
         self.thumb_cache = {}
+        self.thumb_store = ThumbStore()   # lemezen tárolt thumbnail-ek
+        self.thumb_loader = ThumbnailLoader(self.thumb_store)
+        self.thumb_loader.thumb_ready.connect(self.on_thumb_ready)
         self.aspect_ratio = Qt.AspectRatioMode.KeepAspectRatio
         self.smooth = Qt.TransformationMode.SmoothTransformation
 
@@ -641,6 +1609,7 @@ class ImageViewer(QWidget):
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_label.setMinimumSize(200, 200)
         self.image_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.image_label.installEventFilter(self)   # átméretezés -> _schedule_rescale
         self.splitter.addWidget(self.image_label)
 
         # meta text area (use QTextBrowser to support HTML)
@@ -666,27 +1635,58 @@ class ImageViewer(QWidget):
         iv_layout.addWidget(self.splitter)
         self.stack.addWidget(self.image_view_widget)
 
-        # thumbnail view (scrollable)
-        self.thumb_scroll = QScrollArea()
-        self.thumb_scroll.setWidgetResizable(True)
-        self.thumb_container = QWidget()
-        self.thumb_grid = QGridLayout(self.thumb_container)
-        self.thumb_grid.setHorizontalSpacing(12)
-        self.thumb_grid.setVerticalSpacing(12)
-        self.thumb_grid.setContentsMargins(8, 8, 8, 8)
-        self.thumb_grid.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
-        self.first_width = 960
-        self.thumb_scroll.setWidget(self.thumb_container)
-        self.stack.addWidget(self.thumb_scroll)
+        # thumbnail view (virtualizált: csak a látható cellák rajzolódnak)
+        self.thumb_model = ThumbModel(self.thumb_cache, self)
+        self.thumb_view = QListView()
+        self.thumb_view.setViewMode(QListView.ViewMode.IconMode)
+        self.thumb_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.thumb_view.setMovement(QListView.Movement.Static)
+        self.thumb_view.setUniformItemSizes(True)
+        self.thumb_view.setSpacing(6)
+        self.thumb_view.setItemDelegate(ThumbDelegate(self.thumb_view))
+        self.thumb_view.setModel(self.thumb_model)
+        self.thumb_view.clicked.connect(lambda idx: self.open_image_from_thumb(idx.row()))
+        self.thumb_model.thumb_needed.connect(self.thumb_loader.request)
+        # görgetéskor a látható / közeli thumbnail-ek kerülnek előre
+        self.thumb_view.verticalScrollBar().valueChanged.connect(self.update_thumb_priorities)
+        self.stack.addWidget(self.thumb_view)
         
-        # thumbnail cache progress bar
+        # search box + thumbnail cache progress
+        top_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search prompt, model, LoRA…  (model:xyz, \"exact phrase\")")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textEdited.connect(self.on_search_edited)
+        top_layout.addWidget(self.search_edit, 1)
+        self._search_timer = QTimer(self)   # gépelés közben nem keresünk minden betűre
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self.run_search)
+        self.search_label = QLabel("")
+        top_layout.addWidget(self.search_label)
         self.cache_label = QLabel("Thumbnail cache: 0 / 0")
         self.cache_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        main_layout.addWidget(self.cache_label)     
+        top_layout.addWidget(self.cache_label)
+        main_layout.addLayout(top_layout)
         self.cache_progress.connect(self.update_cache_label)   
 
+        # facet panel (model / sampler / LoRA ... darabszámokkal), alapból rejtve
+        self.facet_tree = QTreeWidget()
+        self.facet_tree.setHeaderHidden(True)
+        self.facet_tree.itemChanged.connect(self.on_facet_toggled)
+        self.facet_tree.hide()
+        self._facet_timer = QTimer(self)    # indexelés közben ritkítva frissítünk
+        self._facet_timer.setSingleShot(True)
+        self._facet_timer.setInterval(300)
+        self._facet_timer.timeout.connect(self.update_facet_filter)
+        self.browse_splitter = QSplitter(Qt.Orientation.Horizontal, self)
+        self.browse_splitter.addWidget(self.facet_tree)
+        self.browse_splitter.addWidget(self.stack)
+        self.browse_splitter.setCollapsible(1, False)
+        self.browse_splitter.setSizes([220, 780])
+
         # show image view by default
-        main_layout.addWidget(self.stack)
+        main_layout.addWidget(self.browse_splitter)
         self.stack.setCurrentWidget(self.image_view_widget)
 
         # ---------- control buttons ----------
@@ -696,6 +1696,17 @@ class ImageViewer(QWidget):
         self.btn_open.clicked.connect(self.open_folder)
         btn_layout.addWidget(self.btn_open)
 
+        # open library (folder + all subfolders)
+        self.btn_library = QPushButton("Open library")
+        self.btn_library.clicked.connect(self.open_library)
+        btn_layout.addWidget(self.btn_library)
+
+        # facet filter panel
+        self.btn_filters = QPushButton("Filters")
+        self.btn_filters.setCheckable(True)
+        self.btn_filters.toggled.connect(self.toggle_filters)
+        btn_layout.addWidget(self.btn_filters)
+
         # theme toggle
         self.btn_toggle_theme = QPushButton("☯")
         self.btn_toggle_theme.clicked.connect(self.toggle_theme)
@@ -721,6 +1732,20 @@ class ImageViewer(QWidget):
         btn_layout.addWidget(self.btn_save)
         
         self.current_meta = empty_meta()  # Namedtuple alapértelmezett értékekkel
+        self.meta_index = MetaIndex()     # perzisztens metaadat cache
+        self.prefetcher = ImagePrefetcher(self.meta_index)
+        self.meta_loader = MetaLoader(self.meta_index)
+        self.meta_loader.meta_ready.connect(self.on_meta_ready)
+        self.meta_indexer = MetaIndexer(self.meta_index)   # keresőindex háttérben
+        self.meta_indexer.progress.connect(self.on_index_progress)
+        self.meta_indexer.indexed.connect(self.on_metas_indexed)
+        self.folder_watcher = FolderWatcher(parent=self)
+        self.folder_watcher.changed.connect(self.on_folder_changed)
+        self.folder_scanner = FolderScanner(parent=self)
+        self.folder_scanner.batch_ready.connect(self.on_scan_batch)
+        self.folder_scanner.finished.connect(self.on_scan_finished)
+        self._nav_times = deque(maxlen=8)  # lapozás időpontjai (sebességhez)
+        self._nav_dir = 1
 
         main_layout.addLayout(btn_layout)
 
@@ -740,96 +1765,136 @@ class ImageViewer(QWidget):
         
     def open_folder_and_select(self, fname):
         folder = os.path.dirname(fname)
-        exts = (".png", ".jpg", ".jpeg", ".webp")
-        self.image_files = sorted([
-            os.path.join(folder, f)
-            for f in os.listdir(folder)
-            if f.lower().endswith(exts)
-        ])
-        # kiválasztott kép indexe
-        self.current_index = self.image_files.index(fname)
-        self.show_image(self.image_files[self.current_index])
+        # a kiválasztott kép azonnal látszik, a mappa többi része közben töltődik
+        self.begin_folder(folder, [fname])
+        self.current_index = 0
+        self.show_image(fname)
+
+    # ---------------- streamed folder loading ----------------
+    def begin_folder(self, folder, files=(), recursive=False):
+        """
+        Új mappa: régi munka leáll, a listázás háttérben, darabokban érkezik.
+        recursive=True: könyvtár mód, az összes almappa képe egy közös rácsban.
+        """
+        self.folder_watcher.watch(None)
+        self.library_mode = recursive
+        self.thumb_model.root = folder if recursive else None
+        self.all_files = FileList(files)
+        self.image_files = self.all_files
+        self._filters.clear()
+        self.facet_index.clear()
+        self._facet_sel.clear()
+        self._index_progress = (0, 0)
+        self._search_timer.stop()
+        self.search_edit.clear()
+        self.current_index = -1
+        self._auto_file = None      # az első adagból automatikusan mutatott kép
+        self.reset_thumbnails()
+        self.refresh_facet_panel()
+        self.thumb_loader.extend(self.image_files)
+        self.meta_indexer.index(self.all_files)
+        self.folder_scanner.scan(folder, recursive)
+
+    def on_scan_batch(self, gen, batch):
+        if not self.folder_scanner.generation.is_current(gen):
+            return
+        # ami már bent van (pl. a kiválasztott kép), azt kihagyjuk
+        batch = self.all_files.merge(batch)
+        if not batch:
+            return
+        self.meta_indexer.add(batch)
+        if not self.library_mode:
+            # könyvtár módban a thumbnail csak igény szerint (látható / közeli) készül
+            self.thumb_loader.extend(batch)
+        if self.image_files is not self.all_files:
+            # aktív keresés: csak a találatok kerülnek a nézetbe
+            batch = self.image_files.merge(p for p in batch if self._passes(p))
+            if not batch:
+                return
+        if self.stack.currentWidget() is self.thumb_view:
+            self.thumb_model.apply_changes(batch, [])   # görgetési pozíció marad
+        else:
+            self.thumb_model.set_files(self.image_files)
+        if self.current_index < 0:
+            # az első adag: mutassuk az első képet, nem várunk a listázás végére
+            self.current_index = 0
+            self.show_image(self.image_files[0])
+            self._auto_file = self.current_file
+        elif self.current_file is not None:
+            self.current_index = self.image_files.get_index(self.current_file)
+        self.cache_progress.emit(len(self.thumb_cache), len(self.image_files))
+
+    def on_scan_finished(self, gen, folders, known):
+        if not self.folder_scanner.generation.is_current(gen):
+            return
+        self.folder_watcher.watch(folders, known)
+        # ha közben nem lapozott senki, a rendezés szerinti első képre állunk
+        if self._auto_file is not None and self._auto_file == self.current_file and self.current_index > 0:
+            self.current_index = 0
+            self.show_image(self.image_files[0])
+        self._auto_file = None
 
 
     # ---------------- helper: get a thumbnail (with cache) ----------------
     
-    def start_thumbnail_cache(self):
-        if hasattr(self, "_cache_thread_started") and self._cache_thread_started:
+    def reset_thumbnails(self):
+        """Új fájllista: a régi munka leáll, a cache ürül (új generáció)."""
+        self.thumb_loader.cancel()
+        self.prefetcher.clear()
+        self.thumb_cache.clear() # clear old thumbs 
+        self.thumb_model.set_files(self.image_files)
+        self.cache_progress.emit(0, len(self.image_files))
+
+    def on_thumb_ready(self, gen, path, qimg):
+        # egy korábbi mappa késve érkező eredménye -> eldobjuk
+        if not self.thumb_loader.generation.is_current(gen):
             return
-        self._cache_thread_started = True
-        thread = Thread(target=self.preload_thumbnails, daemon=True)
-        thread.start()
-
-    def preload_thumbnails(self):
-        w, h = 160, 120  # thumbnail méret
-        for i, path in enumerate(self.image_files, start=1):
-            pix = QPixmap(path)
-            if pix.isNull():
-                # üres thumbnail, ha valami hiba
-                thumb = QPixmap(w, h)
-                thumb.fill(Qt.GlobalColor.transparent)
-            else:
-                thumb = pix.scaled(w, h, self.aspect_ratio, self.smooth)
-                self.thumb_cache[path] = thumb
-                self.cache_progress.emit(i, len(self.image_files))  # frissítjük a progress jelzést
-#            self.cache_progress.emit(i, total)  # frissítjük a progress jelzést
+        # GUI szál: itt már szabad QPixmap-et készíteni
+        self.thumb_cache[path] = QPixmap.fromImage(qimg)
+        self.thumb_model.thumb_updated(path)
+        self.cache_progress.emit(len(self.thumb_cache), len(self.image_files))  # frissítjük a progress jelzést
             
     # ---------------- show thumbnails grid ----------------
-#    def resizeEvent(self, event):
-#        super().resizeEvent(event)
-#        if hasattr(self, 'thumb_grid') and hasattr(self, 'image_files'):
-#            self.show_thumbnails()
-
     def update_cache_label(self, current, total):
         self.cache_label.setText(f"Thumbnail cache: {current} / {total}")
 
     def show_thumbnails(self, event=None):
         if not self.image_files:
             return
-        # thumbnail méret + spacing
-        thumb_w, thumb_h = 160, 120
-        spacing = self.thumb_grid.horizontalSpacing() or 12
-
-        container_width = self.first_width
-        sys.stdout.flush()    
-        # számoljuk, hány fér el vízszintesen
-        cols = max(1, container_width // (thumb_w + spacing))
-        
-        for i in reversed(range(self.thumb_grid.count())):
-            widget_item = self.thumb_grid.itemAt(i)
-            if widget_item:
-                w = widget_item.widget()
-                if w:
-                    w.setParent(None)
-
-        # ha kevés a kép: számold ki hány oszlop van
-        used_cols = min(cols, len(self.image_files))
-        total_thumb_width = used_cols * thumb_w + (used_cols - 1) * spacing
-
-        # mennyi maradék hely van két oldalon:
-        side_margin = max((container_width - total_thumb_width) // 2, 0)
-
-        # ezt állítsd be bal és jobb margónak
-        self.thumb_grid.setContentsMargins(side_margin, 12, side_margin, 12)
-        self.thumb_grid.setHorizontalSpacing(spacing)
-        self.thumb_grid.setVerticalSpacing(spacing)
-        
-        for i, path in enumerate(self.image_files):
-            lbl = QLabel()
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            pixmap = self.thumb_cache.get(path, QPixmap(thumb_w, thumb_h))
-            lbl.setPixmap(pixmap)
-            lbl.setToolTip(os.path.basename(path))
-            lbl.mousePressEvent = lambda e, idx=i: self.open_image_from_thumb(idx)
-            row, col = divmod(i, cols)
-            self.thumb_grid.addWidget(lbl, row, col)
-
-        # mutassuk a thumb scrollt
-        self.stack.setCurrentWidget(self.thumb_scroll)
-        self.first_width = self.thumb_scroll.viewport().width()
-        self.thumb_grid.update()
-        self.thumb_scroll.viewport().update()
-        QApplication.processEvents()
+        if self.thumb_model.files != self.image_files:
+            self.thumb_model.set_files(self.image_files)
+        # mutassuk a rácsot, az aktuális kép legyen látható
+        self.stack.setCurrentWidget(self.thumb_view)
+        if 0 <= self.current_index < len(self.image_files):
+            idx = self.thumb_model.index(self.current_index)
+            self.thumb_view.setCurrentIndex(idx)
+            self.thumb_view.scrollTo(idx)
+        QTimer.singleShot(0, self.update_thumb_priorities)
+
+    def _first_row_below(self, y):
+        """Az első sor, aminek az alja y alatt van (a cellák y szerint rendezettek -> bináris keresés)."""
+        lo, hi = 0, self.thumb_model.rowCount()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.thumb_view.visualRect(self.thumb_model.index(mid)).bottom() < y:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def update_thumb_priorities(self, *args):
+        if self.stack.currentWidget() is not self.thumb_view or not self.thumb_model.files:
+            return
+        files = self.thumb_model.files
+        vp_h = self.thumb_view.viewport().height()
+        # visualRect viewport koordinátában van: 0..vp_h a látható rész
+        vis_start = self._first_row_below(0)
+        vis_end = self._first_row_below(vp_h + 1)
+        near_start = self._first_row_below(-vp_h)
+        near_end = self._first_row_below(2 * vp_h + 1)
+        visible = [p for p in files[vis_start:vis_end] if p not in self.thumb_cache]
+        near = [p for p in files[near_start:near_end] if p not in self.thumb_cache]
+        self.thumb_loader.prioritize(visible, near)
 
     # ---------------- open image from thumbnail click ----------------
     def open_image_from_thumb(self, index):
@@ -841,19 +1906,72 @@ class ImageViewer(QWidget):
         self.stack.setCurrentWidget(self.image_view_widget)
 
     # ---------------- safe image rescale from cached pixmap ----------------    #
+    def _decode_target(self):
+        """A nagy nézet dekódolási célmérete fizikai pixelben ((0, 0) = teljes felbontás)."""
+        if not SCREEN_RES_DECODE:
+            return (0, 0)
+        ratio = self.image_label.devicePixelRatioF()
+        return (int(max(50, self.image_label.width()) * ratio),
+                int(max(50, self.image_label.height()) * ratio))
+
+    def _full_res_pixmap(self):
+        # teljes felbontás csak 1:1 nagyításkor, lustán
+        if self._full_pixmap is None:
+            if self.current_pixmap.width() >= self.current_full_size.width():
+                self._full_pixmap = self.current_pixmap
+            else:
+                self._full_pixmap = QPixmap(self.current_file)
+        return self._full_pixmap
+
+    def toggle_zoom(self):
+        if not self.current_pixmap:
+            return
+        self.zoom_1to1 = not self.zoom_1to1
+        if not self.zoom_1to1:
+            self._full_pixmap = None     # a nagy kép ne maradjon a memóriában
+        self._update_image_label()
+
     def _update_image_label(self):
         if not self.current_pixmap or self.current_pixmap.isNull():
             self.image_label.setText("No image loaded")
             return
         w = max(50, self.image_label.width())
         h = max(50, self.image_label.height())
-        scaled = self.current_pixmap.scaled(w, h, self.aspect_ratio, self.smooth)
+        if self.zoom_1to1:
+            full = self._full_res_pixmap()
+            # 1:1 - a kép közepe, a címke méretére vágva
+            x = max(0, (full.width() - w) // 2)
+            y = max(0, (full.height() - h) // 2)
+            self.image_label.setPixmap(full.copy(x, y, min(w, full.width()), min(h, full.height())))
+            return
+        scaled = self._scaled_cache.get((w, h))
+        if scaled is None:
+            target = self._decode_target()
+            if not decoded_enough(self.current_pixmap.size(), self.current_full_size, *target):
+                # nagyobb lett a címke, mint amire dekódoltunk -> újra, nagyobb méretben
+                qimg, _full = read_image_scaled(self.current_file, *target)
+                if not qimg.isNull():
+                    self.current_pixmap = QPixmap.fromImage(qimg)
+                    self._scaled_cache.clear()
+            scaled = self.current_pixmap.scaled(w, h, self.aspect_ratio, self.smooth)
+            # méretenként megjegyezzük (pl. orientáció oda-vissza váltás)
+            self._scaled_cache[(w, h)] = scaled
+            while len(self._scaled_cache) > 4:
+                self._scaled_cache.popitem(last=False)
         self.image_label.setPixmap(scaled)
         
 
     # ---------------- show a single image + meta ----------------
     def show_image(self, fname):
-        pix = QPixmap(fname)
+        target = self._decode_target()
+        prefetched = self.prefetcher.take(fname)
+        if prefetched is not None and decoded_enough(prefetched[0].size(), prefetched[1], *target):
+            pix = QPixmap.fromImage(prefetched[0])
+            full_size = prefetched[1]
+        else:
+            prefetched = None
+            qimg, full_size = read_image_scaled(fname, *target)
+            pix = QPixmap.fromImage(qimg)
         if pix.isNull():
             self.image_label.setText("Failed to load image")
             self.meta_text.setPlainText(f"Failed to load: {fname}")
@@ -861,33 +1979,66 @@ class ImageViewer(QWidget):
             return
 
         self.current_pixmap = pix
+        self._scaled_cache.clear()
+        self.current_file = fname
+        self.current_full_size = full_size
+        self._full_pixmap = None
+        self.zoom_1to1 = False
         # update label from cache pixmap
         self._update_image_label()
 
         # keep current_index in sync
-        if fname in self.image_files:
-            self.current_index = self.image_files.index(fname)
+        index = self.image_files.get_index(fname)
+        if index >= 0:
+            self.current_index = index
 
-        # AI meta extraction (uses your existing extract_prompts function)
-        try:
-            result = extract_prompts(fname)
-        except Exception as e:
-            debug_log(f"[ERROR] extract_prompts({fname}): {e}")
-            result = ImageMeta("Error: {e}", *["N/A"]*12)
+        # a szomszédos képek előtöltése a lapozás iránya / sebessége szerint
+        self.prefetcher.update(self.image_files, self.current_index, self._nav_dir, self._nav_rate(), target)
 
-        self.current_meta = result  # ahol parsed_meta egy ImageMeta objektum
-        pos = " ".join(result.prompt.split())
-        neg = " ".join(result.neg_prompt.split())
-        img_width = pix.width()
-        img_height = pix.height()
+        # AI meta: előtöltve / az indexben már megvan -> azonnal, különben háttérszálon
+        result = prefetched[2] if prefetched is not None else None
+        if result is None:
+            try:
+                result = self.meta_index.get(fname)
+            except Exception:
+                result = None
+        if result is not None:
+            self.meta_loader.cancel()
+            self.show_meta(fname, result)
+        else:
+            self.current_meta = empty_meta()
+            self.meta_text.setHtml(f"""
+        {self._style_block()}
+        <div class="center">{os.path.basename(fname)} </div>&nbsp;&nbsp;({full_size.width()} x {full_size.height()} px)<br>
+        <i>loading metadata…</i>
+        """)
+            self.meta_loader.request(fname)
+        # ensure we are in the image view
+        self.stack.setCurrentWidget(self.image_view_widget)
+        
+
+    def on_meta_ready(self, gen, fname, result):
+        # késve érkezett eredmény egy már elhagyott képhez -> eldobjuk
+        if not self.meta_loader.generation.is_current(gen) or fname != self.current_file:
+            return
+        self.show_meta(fname, result)
 
+    def _style_block(self):
         # build HTML using your get_style() method if exists, else fallback
-        
         try:
-            style_block = self.get_style()
+            return self.get_style()
         except Exception:
             # fallback: try global styles
-            style_block = (globals().get("STYLE_DARK") if self.dark_mode else globals().get("STYLE_LIGHT", ""))
+            return (globals().get("STYLE_DARK") if self.dark_mode else globals().get("STYLE_LIGHT", ""))
+
+    # ---------------- meta HTML ----------------
+    def show_meta(self, fname, result):
+        self.current_meta = result  # ahol parsed_meta egy ImageMeta objektum
+        pos = " ".join(result.prompt.split())
+        neg = " ".join(result.neg_prompt.split())
+        img_width = self.current_full_size.width()
+        img_height = self.current_full_size.height()
+        style_block = self._style_block()
 
         meta_html = f"""
         {style_block}
@@ -904,14 +2055,11 @@ class ImageViewer(QWidget):
         <span class="key">🧠 VAE:</span> {result.vae}--> <br>
         <span class="key3">✨ LoRA:</span> {result.loras}
         """
+        if result.extra:
+            other = " &nbsp;·&nbsp; ".join(f"{html.escape(str(k))}: {html.escape(str(v))}" for k, v in result.extra.items())
+            meta_html += f"""<br><span class="key3">🧩 Other:</span> {other}"""
 
         self.meta_text.setHtml(meta_html)
-        # ensure we are in the image view
-        self.stack.setCurrentWidget(self.image_view_widget)
-        
-#        if not self.thumbnail_cache_done:
-#            self.start_thumbnail_cache()
-#            self.thumbnail_cache_done = True
 
 
     # ---------------- get_style method (uses your global STYLE_* constants) ----------------
@@ -930,13 +2078,28 @@ class ImageViewer(QWidget):
             self.meta_text.setHtml(self.get_style())
 
     # ---------------- next / prev image ----------------
+    def _note_nav(self, direction):
+        if direction != self._nav_dir:
+            self._nav_times.clear()
+        self._nav_dir = direction
+        self._nav_times.append(time.monotonic())
+
+    def _nav_rate(self):
+        """Lapozás / másodperc az utolsó néhány lépés alapján (0, ha régen volt)."""
+        if len(self._nav_times) < 2 or time.monotonic() - self._nav_times[-1] > 1.0:
+            return 0.0
+        span = self._nav_times[-1] - self._nav_times[0]
+        return (len(self._nav_times) - 1) / span if span > 0 else float(PREFETCH_MAX)
+
     def show_next(self):
         if self.image_files and self.current_index < len(self.image_files) - 1:
+            self._note_nav(1)
             self.current_index += 1
             self.show_image(self.image_files[self.current_index])
 
     def show_prev(self):
         if self.image_files and self.current_index > 0:
+            self._note_nav(-1)
             self.current_index -= 1
             self.show_image(self.image_files[self.current_index])
 
@@ -945,27 +2108,180 @@ class ImageViewer(QWidget):
         folder = QFileDialog.getExistingDirectory(self, "Select folder") 
         if not folder: 
             return 
-        exts = (".png", ".jpg", ".jpeg", ".webp") 
-        self.image_files = sorted([os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(exts)]) 
-        self.current_index = 0 if self.image_files else -1 
-        self._cache_thread_started = False
-        self.thumb_cache.clear() # clear old thumbs 
-        self.cache_total = 0
-        self.cache_current = 0
-        if self.image_files: 
-            self.show_image(self.image_files[self.current_index]) 
-        QTimer.singleShot(100, self.start_thumbnail_cache)
+        self.begin_folder(folder)
+
+    # ---------------- open library (recursive, all subfolders) ----------------
+    def open_library(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select library folder")
+        if not folder:
+            return
+        self.begin_folder(folder, recursive=True)
 
     # ---------------- load current folder at startup ----------------
     def load_current_folder(self):
         folder = os.getcwd()
-        exts = (".png", ".jpg", ".jpeg", ".webp")
-        self.image_files = sorted([os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(exts)])
-        self.current_index = 0 if self.image_files else -1
-        self.thumb_cache.clear()
-        if self.image_files:
-            self.show_image(self.image_files[self.current_index])
-        QTimer.singleShot(100, self.start_thumbnail_cache)
+        self.begin_folder(folder)
+
+    # ---------------- folder watcher -> incremental update ----------------
+    def on_folder_changed(self, added, removed, modified):
+        current = self.current_file if 0 <= self.current_index < len(self.image_files) else None
+        gone = set(removed)
+        for path in removed + modified:
+            self.thumb_cache.pop(path, None)
+            self.thumb_loader.forget(path)
+            self.prefetcher.forget(path)
+        self.all_files.remove_many(gone)
+        self.all_files.merge(added)
+        shown = added
+        if self.image_files is not self.all_files:
+            self.image_files.remove_many(gone)
+            shown = self.image_files.merge(p for p in added if self._passes(p))
+        self.thumb_model.apply_changes(shown, removed)
+        for path in modified:
+            self.thumb_model.thumb_updated(path)
+        if not self.library_mode:
+            self.thumb_loader.add(sorted(added + modified))
+        self.meta_indexer.add(added + modified)
+        for path in removed:
+            self.facet_index.remove(path)
+        self.cache_progress.emit(len(self.thumb_cache), len(self.image_files))
+
+        # az aktuális kép maradjon kijelölve; ha törölték, a helyére lépünk
+        if current in gone:
+            if self.image_files:
+                self.current_index = min(self.current_index, len(self.image_files) - 1)
+                self.show_image(self.image_files[self.current_index])
+            else:
+                self.current_index = -1
+                self.current_pixmap = None
+                self._update_image_label()
+        elif current in self.image_files:
+            self.current_index = self.image_files.index(current)
+            if current in modified:
+                self.show_image(current)
+        elif self.image_files and self.current_index < 0:
+            self.current_index = 0
+            self.show_image(self.image_files[0])
+
+    # ---------------- search / filters ----------------
+    def _passes(self, path):
+        return all(path in allowed for allowed in self._filters.values())
+
+    def apply_filters(self):
+        """A nézet (rács + lapozás) újraépítése az aktív keresés / szűrők alapján."""
+        if self._filters:
+            view = FileList(p for p in self.all_files if self._passes(p))
+        else:
+            view = self.all_files
+        changed = view != self.image_files
+        self.image_files = view
+        if changed:
+            self.thumb_model.set_files(view)
+            QTimer.singleShot(0, self.update_thumb_priorities)
+        self.current_index = view.get_index(self.current_file) if self.current_file else -1
+        self.cache_progress.emit(len(self.thumb_cache), len(self.image_files))
+        self.update_search_label()
+        self.refresh_facet_panel()
+
+    def on_search_edited(self, text):
+        # a felhasználó gépel -> az eredmény a rácsban jelenjen meg
+        self._search_show = bool(text.strip())
+        self._search_timer.start()
+
+    def run_search(self):
+        text = self.search_edit.text().strip()
+        found = self.meta_index.search(text) if text else None
+        if found is not None:
+            self._filters["search"] = found
+        else:
+            # üres, vagy csak írásjelekből álló szöveg: nincs keresés szűrő
+            self._filters.pop("search", None)
+        self.apply_filters()
+        if self._search_show and self.image_files:
+            self._search_show = False
+            self.show_thumbnails()
+
+    def on_index_progress(self, gen, done, total):
+        if not self.meta_indexer.generation.is_current(gen):
+            return
+        self._index_progress = (done, total)
+        # az újonnan indexelt képek is kerüljenek be a találatok közé (ritkítva)
+        if "search" in self._filters and not self._search_timer.isActive():
+            self._search_timer.start()
+        self.update_search_label()
+
+    # ---------------- facet filters ----------------
+    def on_metas_indexed(self, gen, metas):
+        if not self.meta_indexer.generation.is_current(gen):
+            return
+        self.facet_index.update(metas)
+        if not self._facet_timer.isActive():
+            self._facet_timer.start()
+
+    def update_facet_filter(self):
+        if self._facet_sel:
+            self._filters["facets"] = self.facet_index.filter(self._facet_sel)
+        else:
+            self._filters.pop("facets", None)
+        self.apply_filters()
+
+    def on_facet_toggled(self, item, column):
+        key = item.data(0, Qt.ItemDataRole.UserRole)
+        if not key:
+            return
+        field, value = key
+        selected = self._facet_sel.setdefault(field, set())
+        if item.checkState(0) == Qt.CheckState.Checked:
+            selected.add(value)
+        else:
+            selected.discard(value)
+        if not selected:
+            del self._facet_sel[field]
+        # a fát a saját jelzéséből nem építjük újra -> a következő körben
+        QTimer.singleShot(0, self.update_facet_filter)
+
+    def toggle_filters(self, checked):
+        self.facet_tree.setVisible(checked)
+        self.refresh_facet_panel()
+
+    def refresh_facet_panel(self):
+        """A facet fa újraépítése az aktuális darabszámokkal (kijelölés, nyitott ágak megmaradnak)."""
+        if self.facet_tree.isHidden():
+            return
+        counts = self.facet_index.counts(self._facet_sel, self._filters.get("search"))
+        collapsed = set()
+        for i in range(self.facet_tree.topLevelItemCount()):
+            header = self.facet_tree.topLevelItem(i)
+            if not header.isExpanded():
+                collapsed.add(header.data(0, Qt.ItemDataRole.UserRole + 1))
+        scroll = self.facet_tree.verticalScrollBar().value()
+        self.facet_tree.blockSignals(True)
+        self.facet_tree.clear()
+        for field, label in FACET_FIELDS:
+            selected = self._facet_sel.get(field, set())
+            header = QTreeWidgetItem([label])
+            header.setData(0, Qt.ItemDataRole.UserRole + 1, field)
+            for value, n in sorted(counts[field].items(), key=lambda kv: (-kv[1], kv[0])):
+                if n == 0 and value not in selected:
+                    continue
+                child = QTreeWidgetItem([f"{value}  ({n})"])
+                child.setFlags(child.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                child.setCheckState(0, Qt.CheckState.Checked if value in selected else Qt.CheckState.Unchecked)
+                child.setData(0, Qt.ItemDataRole.UserRole, (field, value))
+                header.addChild(child)
+            self.facet_tree.addTopLevelItem(header)
+            header.setExpanded(field not in collapsed)
+        self.facet_tree.blockSignals(False)
+        self.facet_tree.verticalScrollBar().setValue(scroll)
+
+    def update_search_label(self):
+        parts = []
+        if self._filters:
+            parts.append(f"{len(self.image_files)} / {len(self.all_files)} shown")
+        done, total = self._index_progress
+        if done < total:
+            parts.append(f"indexing {done} / {total}")
+        self.search_label.setText("  ·  ".join(parts))
 
     # ---------------- toggle splitter orientation ----------------
     def toggle_orientation(self):
@@ -985,8 +2301,8 @@ class ImageViewer(QWidget):
             s.setOrientation(Qt.Orientation.Vertical)
         # apply sizes based on new geometry after layout settles
         s.setSizes([max(50, int(r * (s.width() if s.orientation()==Qt.Orientation.Horizontal else s.height()))) for r in ratios])
-        # update image scale
-        self._update_image_label()
+        # update image scale (debounced, a layout még mozoghat)
+        self._schedule_rescale()
 
     # ---------------- save metadata to txt ----------------
     def save_meta(self):
@@ -994,9 +2310,9 @@ class ImageViewer(QWidget):
             return
         fname = self.image_files[self.current_index]
         try:
-            result = extract_prompts(fname)
+            result = self.meta_index.get_or_extract(fname)
         except Exception as e:
-            result = ImageMeta("Error: {e}", *["N/A"]*12)
+            result = empty_meta()._replace(prompt=f"Error: {e}")
         pos = " ".join(result.prompt.split())
         neg = " ".join(result.neg_prompt.split())
         
@@ -1013,6 +2329,8 @@ class ImageViewer(QWidget):
             f"🧠 VAE: {result.vae}\n"
             f"✨ LoRA: {result.loras}\n"
         )
+        for k, v in result.extra.items():
+            text_content += f"🧩 {k}: {v}\n"
         txt_file = os.path.splitext(fname)[0] + ".txt"
         try:
             with open(txt_file, "w", encoding="utf-8") as f:
@@ -1021,10 +2339,22 @@ class ImageViewer(QWidget):
             print("Save error:", e)
 
     # ---------------- handle resize -> rescale current pixmap ----------------
-#    def resizeEvent(self, event):
-#        super().resizeEvent(event)
-#        # use a slight delay to allow layout updates, then rescale
-#        self._update_image_label()
+    # A címke minden átméretezése (ablak, splitter húzás, orientáció váltás) ide fut be.
+    def eventFilter(self, obj, event):
+        if obj is self.image_label and event.type() == QEvent.Type.Resize:
+            self._schedule_rescale()
+        return super().eventFilter(obj, event)
+
+    def _schedule_rescale(self):
+        # húzás közben gyors (FastTransformation) előnézet, a végén egy sima skálázás
+        if self.current_pixmap and not self.current_pixmap.isNull() and not self.zoom_1to1:
+            w = max(50, self.image_label.width())
+            h = max(50, self.image_label.height())
+            cached = self._scaled_cache.get((w, h))
+            if cached is None:
+                cached = self.current_pixmap.scaled(w, h, self.aspect_ratio, Qt.TransformationMode.FastTransformation)
+            self.image_label.setPixmap(cached)
+        self._rescale_timer.start()
 
     def copy_link(self, url):
 
@@ -1043,6 +2373,17 @@ class ImageViewer(QWidget):
 #        QToolTip.showText(self.cursor().pos(), "✔ Text copied", self, QRect(), 1000)
         ToastMessage.display(self, "✔ Text copied")
 
+    # ---------------- close -> stop background exiftool ----------------
+    def closeEvent(self, event):
+        shutdown_exiftool()
+        self.thumb_loader.shutdown()
+        self.prefetcher.shutdown()
+        self.meta_loader.shutdown()
+        self.meta_indexer.shutdown()
+        self.meta_index.close()
+        self.thumb_store.close()
+        super().closeEvent(event)
+
     # ---------------- optional: keyPressEvent fallback ----------------
 
     def keyPressEvent(self, event):
@@ -1057,6 +2398,13 @@ class ImageViewer(QWidget):
 
 # ---------- run ----------
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "extract":
+        # headless: nincs QApplication, kijelző nélkül is fut (Qt nélkül: python -m mapic extract)
+        from mapic.cli import run_extract_cli
+        sys.exit(run_extract_cli(sys.argv[2:]))
+    # csak a GUI-nak: a mapic.meta importálása nem állít át semmit
+    sys.excepthook = global_exception_hook
+    qInstallMessageHandler(qt_message_handler)
     app = QApplication(sys.argv)
     w = ImageViewer()
     app.setWindowIcon(QIcon("MaPic.ico"))
@@ -11,7 +11,7 @@ Developed with assistance from ChatGPT (OpenAI GPT-5 mini) :)
 import sys
 import os
 import subprocess, json
-import exifread, re
+import re
 import html
 import unicodedata
 from PyQt6.QtWidgets import (
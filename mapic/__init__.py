@@ -0,0 +1,6 @@
+"""
+MaPic - Image Viewer + AI Metadata.
+
+mapic.meta: Qt-free metadata parsing (importable from workers and batch tools).
+mapic.cli:  headless commands, run with `python -m mapic extract DIR`.
+"""
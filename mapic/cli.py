@@ -0,0 +1,104 @@
+"""
+Headless metadata extraction, no Qt:
+
+    python -m mapic extract DIR --format jsonl|csv --workers N [-o FILE]
+"""
+import os
+import sys
+import json
+import csv
+import argparse
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .meta import ImageMeta, empty_meta, extract_prompts, shutdown_exiftool
+from .files import iter_image_tree
+
+CLI_CHUNK = 32      # ennyi fájl megy egyszerre egy worker folyamatnak
+
+def meta_record(path):
+    """Egy fájl metaadata kiírható rekordként (hiba esetén "error" mezővel)."""
+    try:
+        record = {"path": path, **extract_prompts(path)._asdict()}
+    except Exception as e:
+        record = {"path": path, **empty_meta()._asdict(), "error": str(e)}
+    return record
+
+def meta_records(paths):
+    # a worker folyamatban fut: egy adag egyetlen oda-vissza üzenet
+    return [meta_record(p) for p in paths]
+
+def extract_records(paths, workers):
+    """
+    Rekordok a bemeneti sorrendben. workers > 1 esetén folyamat-pool, amibe a
+    listázással párhuzamosan, korlátozott előretartással adagolunk (streaming).
+    """
+    if workers <= 1:
+        yield from map(meta_record, paths)
+        return
+    it = iter(paths)
+    batches = iter(lambda: list(itertools.islice(it, CLI_CHUNK)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(meta_records, batch))
+            if len(pending) >= workers * 4:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def _csv_row(record):
+    row = dict(record)
+    row["loras"] = "; ".join(
+        f"{l[0]}:{l[1]}" if isinstance(l, (list, tuple)) and len(l) == 2 else str(l) for l in record["loras"]
+    )
+    row["extra"] = json.dumps(record["extra"], ensure_ascii=False, default=str) if record["extra"] else ""
+    return row
+
+def run_extract_cli(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m mapic extract",
+        description="Extract AI generation metadata from a folder tree without the GUI.")
+    parser.add_argument("folder", help="folder to scan")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--no-recursive", action="store_true", help="do not descend into subfolders")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.folder):
+        parser.error(f"not a folder: {args.folder}")
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    started = time.monotonic()
+    count = errors = 0
+    try:
+        paths = iter_image_tree(os.path.abspath(args.folder), recursive=not args.no_recursive)
+        if args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=["path", *ImageMeta._fields, "error"])
+            writer.writeheader()
+        for record in extract_records(paths, args.workers):
+            if args.format == "csv":
+                writer.writerow(_csv_row(record))
+            else:
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            count += 1
+            errors += "error" in record
+    except BrokenPipeError:
+        # pl. | head: az olvasó kilépett, ez nem hiba
+        sys.stdout = None
+        return 0
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        shutdown_exiftool()
+    print(f"{count} files, {errors} errors, {time.monotonic() - started:.1f} s", file=sys.stderr)
+    return 1 if errors else 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["extract"]:
+        return run_extract_cli(argv[1:])
+    print("usage: python -m mapic extract DIR [--format jsonl|csv] [--workers N] [-o FILE]", file=sys.stderr)
+    return 2
@@ -0,0 +1,47 @@
+"""
+Image file listing (os.scandir based), shared by the viewer and the CLI.
+"""
+import os
+from collections import deque
+
+from .meta import debug_log
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+def iter_images(folder, subdirs=None):
+    """
+    os.scandir alapú listázás: (path, size, mtime_ns) a képfájlokra.
+    A DirEntry típus / stat adatait használja (Windowson ez a listázással együtt jön).
+    Ha subdirs egy lista, az almappák (rejtettek és symlinkek nélkül) ide kerülnek.
+    """
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.name.lower().endswith(IMAGE_EXTS):
+                if subdirs is not None and not entry.name.startswith("."):
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                    except OSError:
+                        pass
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            yield entry.path, st.st_size, st.st_mtime_ns
+
+def iter_image_tree(root, recursive=True):
+    """A mappa (és almappái) képei, mappánként rendezve, listázás közben adagolva."""
+    folders = deque([root])
+    while folders:
+        folder = folders.popleft()
+        subdirs = [] if recursive else None
+        try:
+            paths = sorted(path for path, _size, _mtime in iter_images(folder, subdirs))
+        except OSError as e:
+            debug_log(f"[ERROR] scan {folder}: ({e})")
+            continue
+        yield from paths
+        if subdirs:
+            folders.extend(sorted(subdirs))
@@ -0,0 +1,19 @@
+"""
+Qt-free AI metadata parsing: ImageMeta, extract_prompts and the format parsers.
+
+Importing this package pulls in only the standard library, so worker processes
+and batch tools can load it in milliseconds.
+"""
+from .core import (
+    DEBUG, debug_log, META_PARSER_VERSION, ImageMeta, empty_meta,
+    meta_to_json, meta_from_json, extract_loras_from_usercomment,
+    decode_surrogate_pair, decode_surrogates,
+)
+from .exiftool import ExifToolSession, get_exiftool, shutdown_exiftool
+from .readers import read_png_text_chunks, read_jpeg_usercomment, read_jpeg_fields
+from .comfy import extract_comfy_graph, scan_prompt_json
+from .parsers import (
+    MetaParser, META_PARSERS, register_parser, find_parser, parse_meta_fields,
+    tokenize_a1111_params, split_a1111,
+    extract_prompts, extract_prompts_png, extract_prompts_jpg, extract_from_usercomment,
+)
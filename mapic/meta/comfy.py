@@ -0,0 +1,214 @@
+"""
+ComfyUI prompt graph (API format) -> ImageMeta in a single pass.
+"""
+import re
+from collections import deque
+
+from .core import ImageMeta
+
+# ---------- ComfyUI prompt gráf (egy bejárás, linkek feloldása) ----------
+# kulcsok, amiknek az első (skalár) előfordulását a bejárás megjegyzi - tartalék, ha nincs sampler node
+COMFY_KEYS = ("ckpt_name", "unet_name", "sampler_name", "scheduler", "steps", "cfg",
+              "seed", "noise_seed", "denoise", "vae_name")
+LORA_TAG_RE = re.compile(r"<lora:([^:>]+):([\d.]+)>")
+
+def _is_link(value):
+    """ComfyUI node bemenet link: ["node_id", kimenet_index]."""
+    return (isinstance(value, list) and len(value) == 2
+            and isinstance(value[0], (str, int)) and isinstance(value[1], int))
+
+def _node_inputs(nodes, link):
+    node = nodes.get(str(link[0]))
+    if isinstance(node, dict) and isinstance(node.get("inputs"), dict):
+        return node["inputs"]
+    return None
+
+# a sampler node-ok link bemenetei, amik mögött a beállításai lehetnek
+# (SamplerCustomAdvanced: CFGGuider, BasicScheduler, KSamplerSelect, RandomNoise)
+SAMPLER_LINKS = ("guider", "sigmas", "sampler", "noise")
+
+def _is_sampler(inputs):
+    # a guider lehet CFGGuider (positive / negative) vagy BasicGuider (conditioning)
+    return ("latent_image" in inputs
+            and any(k in inputs for k in ("seed", "noise_seed", "noise"))
+            and (("positive" in inputs and "negative" in inputs) or "guider" in inputs))
+
+def scan_prompt_json(obj):
+    """
+    Egyetlen bejárás a prompt JSON-on. Visszatér:
+      first   - COMFY_KEYS első skalár értékei
+      texts   - a "text" mezők (sorrendben)
+      loras   - {név: súly} (lora_name node-ok és <lora:név:súly> tagek)
+      samplers - a sampler node-ok inputs szótára: latent_image + seed / noise_seed / noise,
+                 és positive + negative vagy guider (KSampler, KSamplerAdvanced, SamplerCustom[Advanced]);
+                 a szintén positive / negative bemenetű ControlNet stb. node-ok nem számítanak
+    """
+    first, texts, loras, samplers = {}, [], {}, []
+
+    def walk(o):
+        if isinstance(o, dict):
+            if "lora_name" in o and isinstance(o["lora_name"], str):
+                loras[o["lora_name"]] = o.get("strength_model", o.get("weight", 1.0))
+            inputs = o.get("inputs")
+            if isinstance(inputs, dict) and _is_sampler(inputs):
+                samplers.append(inputs)
+            for k, v in o.items():
+                if isinstance(v, (dict, list)):
+                    walk(v)
+                elif isinstance(v, str):
+                    if k == "text":
+                        texts.append(v)
+                    if "<lora:" in v:
+                        for name, weight in LORA_TAG_RE.findall(v):
+                            try:
+                                loras[name.strip()] = float(weight)
+                            except ValueError:
+                                loras[name.strip()] = 1.0
+                    if k in COMFY_KEYS and k not in first:
+                        first[k] = v
+                elif k in COMFY_KEYS and k not in first and v is not None:
+                    first[k] = v
+        elif isinstance(o, list):
+            for item in o:
+                walk(item)
+
+    walk(obj)
+    return first, texts, loras, samplers
+
+def _resolve_value(nodes, value, key, max_hops=16):
+    """Link esetén a forrás node értéke (azonos nevű bemenet, vagy az első skalár)."""
+    for _ in range(max_hops):
+        if not _is_link(value):
+            return value
+        inputs = _node_inputs(nodes, value)
+        if inputs is None:
+            return None
+        if key in inputs:
+            value = inputs[key]
+            continue
+        scalars = [v for v in inputs.values() if not isinstance(v, (dict, list))]
+        links = [v for v in inputs.values() if _is_link(v)]
+        value = scalars[0] if scalars else (links[0] if links else None)
+    return None
+
+def _resolve_text(nodes, link, max_nodes=64):
+    """
+    A kondicionálás visszakövetése a sampler bemenetétől az első szöveges node-ig
+    (CLIPTextEncode, SDXL text_g / text_l, Combine / Concat / ControlNet közbülső node-okon át).
+    A positive + negative bemenetű közbülső node-oknál (ControlNetApplyAdvanced, ...)
+    a kimenet sorszáma dönt: 0 = positive, 1 = negative ágat követjük.
+    """
+    queue, seen = deque([link]), set()
+    while queue and len(seen) < max_nodes:
+        link = queue.popleft()
+        node_id = str(link[0])
+        if node_id in seen:
+            continue
+        seen.add(node_id)
+        inputs = _node_inputs(nodes, link)
+        if inputs is None:
+            continue
+        for key in ("text", "text_g", "text_l", "prompt"):
+            if key in inputs:
+                text = _resolve_value(nodes, inputs[key], key)
+                if isinstance(text, str):
+                    return text
+        if "positive" in inputs and "negative" in inputs:
+            branch = inputs["negative" if link[1] == 1 else "positive"]
+            if _is_link(branch):
+                queue.append(branch)
+            continue
+        for key, v in inputs.items():
+            if _is_link(v) and key not in ("clip", "model", "vae", "image", "control_net"):
+                queue.append(v)
+    return None
+
+def _resolve_model(nodes, link, max_hops=32):
+    """A sampler model bemenetének követése (LoRA / patch node-okon át) a betöltőig."""
+    for _ in range(max_hops):
+        inputs = _node_inputs(nodes, link) if _is_link(link) else None
+        if inputs is None:
+            return None
+        for key in ("ckpt_name", "unet_name", "model_name"):
+            if isinstance(inputs.get(key), str):
+                return inputs[key]
+        link = inputs.get("model")
+    return None
+
+def _as_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _sampler_inputs(nodes, inputs):
+    """A sampler bemenetei, kiegészítve a SAMPLER_LINKS node-ok (guider, scheduler, ...) bemeneteivel."""
+    merged = dict(inputs)
+    for key in SAMPLER_LINKS:
+        linked = _node_inputs(nodes, inputs[key]) if _is_link(inputs.get(key)) else None
+        for k, v in (linked or {}).items():
+            merged.setdefault(k, v)
+    return merged
+
+def _sampler_rank(nodes, inputs):
+    """
+    Az alap menet keresése: legnagyobb denoise (hires fix második menete < 1), azonos
+    denoise mellett (KSamplerAdvanced-nek nincs) az elejéről induló, zajt adó menet
+    (a refiner start_at_step > 0, add_noise = disable).
+    """
+    denoise = _as_float(_resolve_value(nodes, inputs.get("denoise", 1.0), "denoise"), 1.0)
+    start = _as_float(_resolve_value(nodes, inputs.get("start_at_step", 0), "start_at_step"), 0)
+    add_noise = _resolve_value(nodes, inputs.get("add_noise", "enable"), "add_noise")
+    return (denoise, start == 0, add_noise not in ("disable", False))
+
+def extract_comfy_graph(prompt_json):
+    """
+    ComfyUI prompt (API formátum: {node_id: {class_type, inputs}}) -> ImageMeta.
+    A JSON-t egyszer járjuk be; a promptok a sampler positive / negative bemenetére
+    ténylegesen bekötött szöveg node-okból jönnek. Több sampler esetén (hires fix,
+    refiner) az alap menet számít (_sampler_rank); ha nincs sampler node,
+    az első "text" mezők és kulcsok az eredmény, mint korábban.
+    """
+    first, texts, loras, samplers = scan_prompt_json(prompt_json)
+    nodes = prompt_json if isinstance(prompt_json, dict) else {}
+    pos = texts[0] if len(texts) > 0 else "N/A"
+    neg = texts[1] if len(texts) > 1 else "N/A"
+    fields = dict(first)
+    fields.setdefault("seed", first.get("noise_seed"))
+    fields.setdefault("ckpt_name", first.get("unet_name"))
+
+    if samplers:
+        main = max((_sampler_inputs(nodes, i) for i in samplers), key=lambda i: _sampler_rank(nodes, i))
+        # BasicGuider (Flux): egyetlen conditioning bemenet, negatív prompt nincs
+        positive = main.get("positive", main.get("conditioning"))
+        p = _resolve_text(nodes, positive) if _is_link(positive) else None
+        n = _resolve_text(nodes, main["negative"]) if _is_link(main.get("negative")) else None
+        pos = p if p is not None else pos
+        neg = n if n is not None else "N/A"     # nem a JSON sorrend szerinti második szöveg
+        model = _resolve_model(nodes, main.get("model"))
+        if model:
+            fields["ckpt_name"] = model
+        for key, names in (("seed", ("seed", "noise_seed")), ("steps", ("steps",)), ("cfg", ("cfg",)),
+                           ("sampler_name", ("sampler_name",)), ("scheduler", ("scheduler",)),
+                           ("denoise", ("denoise",))):
+            for name in names:
+                if name in main:
+                    value = _resolve_value(nodes, main[name], name)
+                    if value is not None and not isinstance(value, (dict, list)):
+                        fields[key] = value
+                    break
+
+    return ImageMeta(
+        prompt = pos,
+        neg_prompt = neg,
+        model = fields.get("ckpt_name") or "-",
+        sampler = fields.get("sampler_name") or "-",
+        scheduler = fields.get("scheduler") or "-",
+        steps = fields.get("steps") or "-",
+        cfg_scale = fields.get("cfg") or "-",
+        seed = fields.get("seed") or "-",
+        denoise = fields.get("denoise") or "-",
+        vae = fields.get("vae_name") or "-",
+        loras = list(loras.items()),      # lista
+        extra = {}
+    )
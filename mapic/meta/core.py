@@ -0,0 +1,111 @@
+"""
+ImageMeta, its JSON form and the small helpers shared by the format parsers.
+Only the standard library - no Qt, no Pillow.
+"""
+import sys
+import json
+import re
+from collections import namedtuple
+
+DEBUG = True                            ##########################################################################
+
+def debug_log(*args):
+    if DEBUG:
+        print("[DEBUG]", *args, file=sys.stderr)   # stdout a CLI kimeneté ##################
+
+# Emeld meg, ha a parserek kimenete változik -> a régi bejegyzések elavulnak.
+META_PARSER_VERSION = 7
+
+# Definiáljuk a metaadat struktúrát
+ImageMeta = namedtuple("ImageMeta", [
+    "prompt",           # 0
+    "neg_prompt",      
+    "model",           
+    "sampler",         
+    "scheduler",       
+    "steps",           
+    "cfg_scale",       
+    "seed",            
+    "denoise",          # 8 - opcionális, ha kell
+    "vae",            
+    "loras",            # 10 - lista a több LoRA-ra
+    "extra"             # 11 - egyéb mezők {név: érték} (A1111: Size, Hires, ADetailer ...)
+], defaults=(None,))
+
+def empty_meta():
+    """Visszaad egy alapértelmezett, üres ImageMeta namedtuple-t."""
+    return ImageMeta(
+        prompt="N/A",
+        neg_prompt="N/A",
+        model="-",
+        sampler="-",
+        scheduler="-",
+        steps="-",
+        cfg_scale="-",
+        seed="-",
+        denoise="-",
+        vae="-",
+        loras=[],
+        extra={}
+    )
+
+def extract_loras_from_usercomment(raw_uc):
+    """
+    Kinyeri a LoRA-kat a JPG UserComment mezőből JSON formátumból.
+    Visszaad egy listát: [(name, weight), ...]
+    Ha hiba történik, kiírja a konzolra, de nem áll le.
+    """
+    loras = []
+    if isinstance(raw_uc, str):
+        raw_text = raw_uc
+    else:
+        try:
+            raw_text = json.dumps(raw_uc, ensure_ascii=False)
+        except Exception:
+            raw_text = str(raw_uc)
+
+    try:
+        # A UserComment tartalmazhat több JSON objektumot egymás után
+        # Például: [{"type":"lora",...}, {"type":"lora",...}]
+        matches = re.findall(r'\{[^\}]*"type"\s*:\s*"lora"[^\}]*\}', raw_text)
+        for m in matches:
+            try:
+                d = json.loads(m)
+                if d.get("type") == "lora":
+                    name = d.get("modelName", "Unknown")
+                    weight = d.get("weight", 1.0)
+                    loras.append((name, weight))
+            except Exception as inner_e:
+                debug_log(f"[ERROR] Failed to parse LoRA block: {inner_e}\nBlock: {m}")
+                continue
+
+    except Exception as e:
+        debug_log(f"[ERROR] Failed to extract LoRA from UserComment: {e}\nUserComment: {raw_text}")
+
+    return loras
+
+def decode_surrogate_pair(txt):
+    if not txt:
+        return "-"
+    try:
+        import codecs
+        return codecs.decode(txt, 'unicode_escape')
+    except Exception:
+        return txt
+        
+def decode_surrogates(txt):
+    if not txt:
+        return "-"
+    try:
+        # kényszerített dekódolás surrogate-okból
+        return txt.encode('utf-16', 'surrogatepass').decode('utf-16')
+    except Exception:
+        return txt
+
+def meta_to_json(meta):
+    return json.dumps(meta._asdict(), ensure_ascii=False, default=str)
+
+def meta_from_json(text):
+    d = json.loads(text)
+    d["loras"] = [tuple(x) if isinstance(x, list) else x for x in d.get("loras", [])]
+    return ImageMeta(**d)
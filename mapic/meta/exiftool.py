@@ -0,0 +1,127 @@
+"""
+Long-lived exiftool process, used only as a fallback for unusual JPG layouts.
+"""
+import os
+import subprocess
+import json
+import atexit
+from threading import Lock
+
+from .core import debug_log
+
+# ---------- exiftool session (egy folyamat, sok kérés) ----------
+class ExifToolSession:
+    """
+    Hosszú életű exiftool folyamat: `exiftool -stay_open True -@ -`.
+    A kéréseket a stdin-re írjuk, a választ a `{readyN}` sorig olvassuk.
+    A Lock sorba állítja a szálakból érkező kéréseket, összeomlás után újraindul.
+    """
+
+    def __init__(self, executable="exiftool"):
+        self.executable = executable
+        self._proc = None
+        self._lock = Lock()
+        self._seq = 0
+        self.available = True   # False, ha nincs exiftool a gépen
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            [self.executable, "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            encoding="utf-8", errors="replace", bufsize=1
+        )
+
+    def _alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _send(self, args):
+        self._seq += 1
+        marker = f"{{ready{self._seq}}}"
+        self._proc.stdin.write("\n".join(args) + f"\n-execute{self._seq}\n")
+        self._proc.stdin.flush()
+        lines = []
+        while True:
+            line = self._proc.stdout.readline()
+            if not line:
+                raise BrokenPipeError("exiftool exited")
+            if line.rstrip("\r\n") == marker:
+                return "".join(lines)
+            lines.append(line)
+
+    def execute(self, *args):
+        """Egy exiftool parancs futtatása, a teljes stdout-ot adja vissza ("" hiba esetén)."""
+        if not self.available:
+            return ""
+        with self._lock:
+            for attempt in range(2):     # egyszer újraindítjuk, ha közben meghalt
+                try:
+                    if not self._alive():
+                        self._start()
+                    return self._send(args)
+                except FileNotFoundError:
+                    debug_log("[ERROR] exiftool not found, JPG UserComment via exiftool disabled")
+                    self.available = False
+                    return ""
+                except (OSError, ValueError) as e:
+                    debug_log(f"[ERROR] exiftool session ({e}), restarting")
+                    self._kill()
+        return ""
+
+    def read_user_comments(self, paths):
+        """Több fájl UserComment mezője egyetlen kéréssel: {path: raw_uc}."""
+        paths = list(paths)
+        if not paths:
+            return {}
+        out = self.execute("-j", "-charset", "filename=utf8", "-UserComment", *paths)
+        if not out.strip():
+            return {}
+        try:
+            data = json.loads(out)
+        except Exception as e:
+            debug_log(f"[ERROR] exiftool JSON: ({e})")
+            return {}
+        # exiftool a SourceFile-ban saját formában adja vissza az utat (pl. / Windowson)
+        by_norm = {os.path.normcase(os.path.normpath(p)): p for p in paths}
+        result = {}
+        for item in data:
+            src = by_norm.get(os.path.normcase(os.path.normpath(item.get("SourceFile", ""))))
+            if src is not None and "UserComment" in item:
+                result[src] = item["UserComment"]
+        return result
+
+    def _kill(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=2)
+            except Exception:
+                pass
+        self._proc = None
+
+    def close(self):
+        """Rendes leállítás: -stay_open False, majd várakozás; ha nem áll le, kill."""
+        with self._lock:
+            if not self._alive():
+                self._proc = None
+                return
+            try:
+                self._proc.stdin.write("-stay_open\nFalse\n")
+                self._proc.stdin.flush()
+                self._proc.wait(timeout=3)
+            except Exception:
+                self._kill()
+            self._proc = None
+
+_exiftool_session = None
+
+def get_exiftool():
+    global _exiftool_session
+    if _exiftool_session is None:
+        _exiftool_session = ExifToolSession()
+    return _exiftool_session
+
+def shutdown_exiftool():
+    if _exiftool_session is not None:
+        _exiftool_session.close()
+
+atexit.register(shutdown_exiftool)
@@ -0,0 +1,366 @@
+"""
+Parser registry: each format has a cheap sniff test and a parse function;
+extract_prompts routes a file to exactly one of them.
+"""
+import os
+import json
+import re
+from collections import namedtuple
+
+from .core import (
+    debug_log, ImageMeta, empty_meta, decode_surrogate_pair,
+    extract_loras_from_usercomment,
+)
+from .comfy import extract_comfy_graph, LORA_TAG_RE, _as_float
+from .readers import read_png_text_chunks, read_jpeg_fields
+
+# ---------- metaadat parser regiszter (formátum felismerés + parse) ----------
+# A nyers mezők ("fields"): PNG-nél a szöveg chunk-ok ({kulcsszó: szöveg}),
+# JPG-nél {"UserComment": szöveg}. Minden formátum egy olcsó sniff(fields)
+# vizsgálatot (kulcs / előtag, JSON parse nélkül) és egy parse(fields) -> ImageMeta
+# függvényt ad; a fájl az első egyező parserhez kerül, és csak az fut le.
+MetaParser = namedtuple("MetaParser", ["name", "sniff", "parse", "priority"])
+META_PARSERS = []
+
+def register_parser(name, sniff, parse, priority=50):
+    """
+    Parser felvétele (vagy azonos névvel cseréje). Kisebb priority = előbb próbáljuk,
+    így egy specifikusabb formátum a tágabb (pl. A1111 szöveg) elé kerülhet.
+    """
+    META_PARSERS[:] = [p for p in META_PARSERS if p.name != name]
+    META_PARSERS.append(MetaParser(name, sniff, parse, priority))
+    META_PARSERS.sort(key=lambda p: p.priority)
+
+def find_parser(fields):
+    for parser in META_PARSERS:
+        if parser.sniff(fields):
+            return parser
+    return None
+
+def parse_meta_fields(fields):
+    """Nyers metaadat mezők -> ImageMeta, pontosan egy parserrel."""
+    parser = find_parser(fields)
+    if parser is None:
+        return empty_meta()
+    try:
+        return parser.parse(fields)
+    except Exception as e:
+        debug_log(f"[ERROR] {parser.name} parser: ({e})")
+        return empty_meta()._replace(prompt="Error")
+
+def _main_text(fields):
+    """A fő szöveges mező: PNG parameters vagy JPG UserComment."""
+    return fields.get("parameters") or fields.get("UserComment") or ""
+
+def _starts_json(text):
+    return text[:64].lstrip().startswith("{")
+
+def _meta_value(value):
+    """Hiányzó érték -> "-", minden más szövegként."""
+    return "-" if value is None or value == "" else str(value)
+
+def _make_meta(prompt=None, neg_prompt=None, **fields):
+    meta = empty_meta()._replace(**{k: _meta_value(v) for k, v in fields.items() if k != "loras"})
+    return meta._replace(
+        prompt = prompt if prompt else "N/A",
+        neg_prompt = neg_prompt if neg_prompt else "N/A",
+        loras = fields.get("loras") or [],
+    )
+
+# --- ComfyUI (PNG "prompt" chunk, vagy JSON gráf a UserCommentben) ---
+def sniff_comfyui(fields):
+    if "prompt" in fields:
+        return _starts_json(fields["prompt"])
+    return _starts_json(fields.get("UserComment") or "")
+
+def parse_comfyui(fields):
+    return extract_comfy_graph(json.loads(fields.get("prompt") or fields["UserComment"]))
+
+# --- Civitai generátor (ComfyUI gráf + extraMetadata a UserCommentben) ---
+def sniff_civitai(fields):
+    uc = fields.get("UserComment") or ""
+    return _starts_json(uc) and '"extraMetadata"' in uc
+
+def parse_civitai(fields):
+    data = json.loads(fields["UserComment"])
+    extra = data.get("extraMetadata") or {}
+    if isinstance(extra, str):
+        extra = json.loads(extra)
+    graph = extract_comfy_graph(data)     # a hiányzó mezők a gráfból jönnek
+    return _make_meta(
+        prompt = extra.get("prompt") or graph.prompt,
+        neg_prompt = extra.get("negativePrompt") or graph.neg_prompt,
+        model = extra.get("modelName") or graph.model,
+        sampler = extra.get("sampler") or graph.sampler,
+        scheduler = extra.get("scheduler") or graph.scheduler,
+        steps = extra.get("steps") or graph.steps,
+        cfg_scale = extra.get("cfgScale") or graph.cfg_scale,
+        seed = extra.get("seed") or graph.seed,
+        denoise = extra.get("denoise") or graph.denoise,
+        vae = extra.get("vae") or graph.vae,
+        loras = extract_loras_from_usercomment(data) or graph.loras,
+    )
+
+# --- A1111 / Forge "parameters" szöveg (PNG chunk vagy JPG UserComment) ---
+def sniff_a1111(fields):
+    text = _main_text(fields)
+    return bool(text) and not _starts_json(text)
+
+# "Kulcs: érték" párok a paraméter sorban; az érték lehet "idézőjeles, vesszővel"
+A1111_PARAM_RE = re.compile(r' ?([^:,\n]+): ("(?:[^"\\]|\\.)*"|[^,\n]*),?')
+# A1111 mezőnév -> ImageMeta mező (az első meglévő számít)
+A1111_FIELDS = {
+    "model": ("Model",),
+    "sampler": ("Sampler",),
+    "scheduler": ("Schedule type", "Scheduler"),
+    "steps": ("Steps",),
+    "cfg_scale": ("CFG scale",),
+    "seed": ("Seed",),
+    "denoise": ("Denoising strength", "Denoise"),
+    "vae": ("VAE", "Vae"),
+}
+
+def tokenize_a1111_params(line):
+    """
+    A paraméter sor ("Steps: 20, Sampler: Euler a, Lora hashes: "a: 1, b: 2", ...)
+    egyetlen balról jobbra haladó regex menetben -> {kulcs: érték}, minden mezővel.
+    """
+    fields = dict(A1111_PARAM_RE.findall(line))
+    for key, value in fields.items():
+        if value[:1] == '"':
+            # idézőjeles érték (A1111 JSON-szerűen escape-el)
+            if "\\" in value:
+                try:
+                    fields[key] = json.loads(value)
+                    continue
+                except ValueError:
+                    pass
+            fields[key] = value.strip('"')
+    return fields
+
+def split_a1111(raw):
+    """A1111 parameters szöveg -> (prompt, negatív prompt, paraméter sor)."""
+    i = raw.rfind("\nSteps: ")
+    if i >= 0:
+        head, params = raw[:i], raw[i + 1:]
+    elif raw.startswith("Steps: "):
+        head, params = "", raw
+    else:
+        # egysoros mentés: "prompt, Negative prompt: ..., Steps: 20, ..."
+        i = raw.rfind("Steps: ")
+        head, params = (raw[:i].rstrip().rstrip(","), raw[i:]) if i >= 0 else (raw, "")
+    i = head.find("Negative prompt:")
+    if i >= 0:
+        pos, neg = head[:i], head[i + len("Negative prompt:"):]
+    else:
+        pos, neg = head, ""
+    return pos.strip().rstrip(","), neg.strip().rstrip(","), params
+
+def parse_a1111(fields):
+    raw = _main_text(fields)
+    pos, neg, params = split_a1111(raw)
+    extra = tokenize_a1111_params(params)
+    values = {}
+    for target, keys in A1111_FIELDS.items():
+        for key in keys:
+            if key in extra:
+                values[target] = extra.pop(key)
+                break
+    pos = pos.replace("\n", " ") or "N/A"
+    neg = neg.replace("\n", " ") or "N/A"
+    if "parameters" not in fields and "\\u" in raw:
+        # egyes JPG mentések \uXXXX escape-elt szöveget írnak a UserCommentbe
+        pos, neg = decode_surrogate_pair(pos), decode_surrogate_pair(neg)
+        if "model" in values:
+            values["model"] = decode_surrogate_pair(values["model"])
+
+    loras = {}
+    for name, weight in LORA_TAG_RE.findall(pos):
+        loras[name.strip()] = _as_float(weight, 1.0)
+
+    return ImageMeta(
+        prompt=pos,
+        neg_prompt=neg,
+        model=values.get("model", "-"),
+        sampler=values.get("sampler", "-"),
+        scheduler=values.get("scheduler", "-"),
+        steps=values.get("steps", "-"),
+        cfg_scale=values.get("cfg_scale", "-"),
+        seed=values.get("seed", "-"),
+        denoise=values.get("denoise", "-"),
+        vae=values.get("vae", "-"),
+        loras=list(loras.items()),
+        extra=extra
+    )
+
+# --- InvokeAI (invokeai_metadata, régebben sd-metadata chunk) ---
+def sniff_invokeai(fields):
+    return "invokeai_metadata" in fields or "sd-metadata" in fields
+
+def _invoke_model_name(model):
+    if isinstance(model, dict):
+        return model.get("model_name") or model.get("name")
+    return model
+
+def parse_invokeai(fields):
+    if "invokeai_metadata" in fields:
+        m = json.loads(fields["invokeai_metadata"])
+        loras = []
+        for l in m.get("loras") or []:
+            name = _invoke_model_name(l.get("lora") or l.get("model"))
+            if name:
+                loras.append((name, l.get("weight", 1.0)))
+        return _make_meta(
+            prompt = m.get("positive_prompt"),
+            neg_prompt = m.get("negative_prompt"),
+            model = _invoke_model_name(m.get("model")),
+            sampler = m.get("scheduler"),     # InvokeAI a samplert schedulernek hívja
+            steps = m.get("steps"),
+            cfg_scale = m.get("cfg_scale"),
+            seed = m.get("seed"),
+            denoise = m.get("strength"),
+            vae = _invoke_model_name(m.get("vae")),
+            loras = loras,
+        )
+    d = json.loads(fields["sd-metadata"])
+    image = d.get("image") or {}
+    prompt = image.get("prompt")
+    if isinstance(prompt, list):
+        prompt = " ".join(p.get("prompt", "") for p in prompt if isinstance(p, dict))
+    neg = None
+    m = re.search(r"\[(.*?)\]", prompt or "", re.DOTALL)    # InvokeAI 2: [negatív] a promptban
+    if m:
+        neg = m.group(1).strip()
+        prompt = (prompt[:m.start()] + prompt[m.end():]).strip()
+    return _make_meta(
+        prompt = prompt,
+        neg_prompt = neg,
+        model = d.get("model_weights"),
+        sampler = image.get("sampler"),
+        steps = image.get("steps"),
+        cfg_scale = image.get("cfg_scale"),
+        seed = image.get("seed"),
+        denoise = image.get("strength"),
+    )
+
+# --- NovelAI (Software = NovelAI, beállítások a Comment chunkban) ---
+def sniff_novelai(fields):
+    return fields.get("Software", "").startswith("NovelAI") and "Comment" in fields
+
+def parse_novelai(fields):
+    c = json.loads(fields["Comment"])
+    return _make_meta(
+        prompt = c.get("prompt") or fields.get("Description"),
+        neg_prompt = c.get("uc"),
+        model = fields.get("Source"),
+        sampler = c.get("sampler"),
+        scheduler = c.get("noise_schedule"),
+        steps = c.get("steps"),
+        cfg_scale = c.get("scale"),
+        seed = c.get("seed"),
+        denoise = c.get("strength"),
+    )
+
+# --- Fooocus (JSON parameters; fooocus_scheme=a1111 esetén az A1111 parser viszi) ---
+def sniff_fooocus(fields):
+    scheme = fields.get("fooocus_scheme")
+    if scheme is not None:
+        return scheme == "fooocus"
+    text = _main_text(fields)
+    return _starts_json(text) and ('"base_model"' in text or '"Base Model"' in text)
+
+def parse_fooocus(fields):
+    d = {k.lower().replace(" ", "_"): v for k, v in json.loads(_main_text(fields)).items()}
+    loras = []
+    for l in d.get("loras") or []:
+        if isinstance(l, (list, tuple)) and len(l) >= 2:
+            loras.append((l[0], l[1]))
+    for k in sorted(k for k in d if k.startswith("lora_combined_")):
+        name, _, weight = str(d[k]).rpartition(" : ")
+        loras.append((name or weight, _as_float(weight, 1.0)))
+    return _make_meta(
+        prompt = d.get("prompt"),
+        neg_prompt = d.get("negative_prompt"),
+        model = d.get("base_model"),
+        sampler = d.get("sampler"),
+        scheduler = d.get("scheduler"),
+        steps = d.get("steps"),
+        cfg_scale = d.get("guidance_scale"),
+        seed = d.get("seed"),
+        vae = d.get("vae"),
+        loras = loras,
+    )
+
+# --- SwarmUI ({"sui_image_params": {...}} a parameters / UserComment mezőben) ---
+def sniff_swarmui(fields):
+    text = _main_text(fields)
+    return _starts_json(text) and '"sui_image_params"' in text[:256]
+
+def parse_swarmui(fields):
+    p = json.loads(_main_text(fields))["sui_image_params"]
+    names = p.get("loras") or []
+    weights = p.get("loraweights") or []
+    loras = [(n, _as_float(weights[i], 1.0) if i < len(weights) else 1.0) for i, n in enumerate(names)]
+    return _make_meta(
+        prompt = p.get("prompt"),
+        neg_prompt = p.get("negativeprompt"),
+        model = p.get("model"),
+        sampler = p.get("sampler"),
+        scheduler = p.get("scheduler"),
+        steps = p.get("steps"),
+        cfg_scale = p.get("cfgscale"),
+        seed = p.get("seed"),
+        denoise = p.get("initimagecreativity"),
+        vae = p.get("vae"),
+        loras = loras,
+    )
+
+# --- tartalék: ismeretlen prompt / parameters tartalom ---
+def sniff_fallback(fields):
+    return "prompt" in fields or "parameters" in fields
+
+def parse_fallback(fields):
+    raw_prompt = fields.get("prompt") or fields.get("parameters") or ""
+    try:
+        return extract_comfy_graph(json.loads(raw_prompt))
+    except ValueError:
+        # nem JSON: a teljes szöveg a pozitív prompt
+        return empty_meta()._replace(prompt=" ".join(raw_prompt.split()) or "N/A")
+
+register_parser("civitai", sniff_civitai, parse_civitai, priority=10)
+register_parser("swarmui", sniff_swarmui, parse_swarmui, priority=20)
+register_parser("fooocus", sniff_fooocus, parse_fooocus, priority=20)
+register_parser("invokeai", sniff_invokeai, parse_invokeai, priority=20)
+register_parser("novelai", sniff_novelai, parse_novelai, priority=20)
+register_parser("comfyui", sniff_comfyui, parse_comfyui, priority=50)
+register_parser("a1111", sniff_a1111, parse_a1111, priority=60)
+register_parser("fallback", sniff_fallback, parse_fallback, priority=100)
+
+def extract_prompts_png(image_path, metadata=None):
+    try:
+        if metadata is None:
+            metadata = read_png_text_chunks(image_path)
+        return parse_meta_fields(metadata)
+    except Exception as e:        
+        debug_log(f"[ERROR] extract_prompts_png: ({e})")
+        return empty_meta()._replace(prompt="Error")
+
+def extract_prompts_jpg(image_path):
+    try:
+        return parse_meta_fields(read_jpeg_fields(image_path))
+    except Exception as e:
+        debug_log(f"[ERROR] extract_prompts_jpg: ({e})")
+        return empty_meta()
+
+def extract_prompts(fname):
+    ext = os.path.splitext(fname)[1].lower()
+    if ext == ".png":
+        return extract_prompts_png(fname)
+    elif ext in (".jpg", ".jpeg"):
+        return extract_prompts_jpg(fname)
+    else:
+        return empty_meta()
+
+def extract_from_usercomment(raw_uc):
+    """JPG UserComment szöveg -> ImageMeta (a formátumot a parser regiszter ismeri fel)."""
+    return parse_meta_fields({"UserComment": raw_uc})
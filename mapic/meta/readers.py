@@ -0,0 +1,189 @@
+"""
+Raw metadata readers: PNG text chunks and the JPG EXIF UserComment.
+They read only the file header, never the pixel data.
+"""
+import struct
+import zlib
+
+from .core import debug_log
+from .exiftool import get_exiftool
+
+# ---------- natív JPEG EXIF UserComment olvasó (exiftool nélkül) ----------
+def _decode_usercomment(raw, byte_order):
+    """
+    UserComment = 8 bájtos karakterkészlet előtag + adat.
+    ASCII / UNICODE (UTF-16 BE vagy LE) / JIS / undefined (nullák).
+    """
+    prefix, body = raw[:8], raw[8:]
+    if prefix.startswith(b"UNICODE"):
+        if body[:2] in (b"\xfe\xff", b"\xff\xfe"):
+            text = body.decode("utf-16", errors="replace")
+        else:
+            # az írók nem mindig a TIFF bájtsorrendet használják -> a nulla bájtok helyéből döntünk
+            even_zeros = body[0::2].count(0)
+            odd_zeros = body[1::2].count(0)
+            if even_zeros != odd_zeros:
+                enc = "utf-16-be" if even_zeros > odd_zeros else "utf-16-le"
+            else:
+                enc = "utf-16-be" if byte_order == ">" else "utf-16-le"
+            text = body[:len(body) & ~1].decode(enc, errors="replace")
+    elif prefix.startswith(b"JIS"):
+        for enc in ("iso2022_jp", "shift_jis"):
+            try:
+                text = body.decode(enc)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            text = body.decode("latin-1")
+    elif prefix.startswith(b"ASCII") or prefix == b"\x00" * 8:
+        # sok program UTF-8-at ír ASCII címke alá is
+        text = body.decode("utf-8", errors="replace")
+    else:
+        # nincs szabványos előtag
+        text = raw.decode("utf-8", errors="replace")
+    return text.strip("\x00").strip()
+
+def _usercomment_from_tiff(tiff):
+    """TIFF blokkban (APP1 'Exif' után) IFD0 -> ExifIFD (0x8769) -> UserComment (0x9286)."""
+    if tiff[:2] == b"II":
+        bo = "<"
+    elif tiff[:2] == b"MM":
+        bo = ">"
+    else:
+        raise ValueError("bad TIFF byte order")
+    if len(tiff) < 8 or struct.unpack(bo + "H", tiff[2:4])[0] != 42:
+        raise ValueError("bad TIFF magic")
+
+    def find_tag(ifd_offset, wanted):
+        if ifd_offset + 2 > len(tiff):
+            raise ValueError("IFD offset out of range")
+        count = struct.unpack(bo + "H", tiff[ifd_offset:ifd_offset + 2])[0]
+        pos = ifd_offset + 2
+        if pos + count * 12 > len(tiff):
+            raise ValueError("IFD truncated")
+        for _ in range(count):
+            tag, typ, n = struct.unpack(bo + "HHI", tiff[pos:pos + 8])
+            if tag == wanted:
+                return typ, n, tiff[pos + 8:pos + 12]
+            pos += 12
+        return None
+
+    ifd0 = struct.unpack(bo + "I", tiff[4:8])[0]
+    entry = find_tag(ifd0, 0x8769)
+    if entry is None:
+        return None
+    exif_ifd = struct.unpack(bo + "I", entry[2])[0]
+    entry = find_tag(exif_ifd, 0x9286)
+    if entry is None:
+        return None
+    typ, n, value = entry
+    if n <= 4:
+        raw = value[:n]
+    else:
+        offset = struct.unpack(bo + "I", value)[0]
+        if offset + n > len(tiff):
+            raise ValueError("UserComment out of range")
+        raw = tiff[offset:offset + n]
+    return _decode_usercomment(raw, bo)
+
+def read_jpeg_usercomment(image_path):
+    """
+    Csak a JPEG fejlécet olvassa: a markereken lépked az APP1/Exif szegmensig,
+    és az első képadat (SOS) előtt megáll.
+    Visszatér: szöveg, vagy None ha nincs UserComment.
+    ValueError: szokatlan / sérült szerkezet (ilyenkor jöhet az exiftool).
+    """
+    with open(image_path, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            raise ValueError("not a JPEG")
+        while True:
+            b = f.read(1)
+            if not b:
+                return None
+            if b != b"\xff":
+                raise ValueError("marker expected")
+            marker = f.read(1)
+            while marker == b"\xff":      # kitöltő bájtok
+                marker = f.read(1)
+            if not marker:
+                return None
+            m = marker[0]
+            if m in (0xD9, 0xDA):           # EOI / SOS: a metaadatnak vége
+                return None
+            if 0xD0 <= m <= 0xD7 or m == 0x01:
+                continue
+            size = f.read(2)
+            if len(size) < 2:
+                return None
+            length = struct.unpack(">H", size)[0]
+            if length < 2:
+                raise ValueError("bad segment length")
+            if m == 0xE1:
+                seg = f.read(length - 2)
+                if seg[:6] == b"Exif\x00\x00":
+                    return _usercomment_from_tiff(seg[6:])
+            else:
+                f.seek(length - 2, 1)
+
+def read_jpeg_fields(image_path):
+    """JPG metaadat mezők a parser regiszternek: {"UserComment": szöveg} (vagy üres)."""
+    try:
+        # 1) natív olvasó (gyors, nem kell hozzá exiftool)
+        raw_uc = read_jpeg_usercomment(image_path)
+    except (ValueError, struct.error) as e:
+        # 2) szokatlan szerkezet -> exiftool session (JSON kimenet)
+        debug_log(f"[INFO] native UserComment reader: ({e}), falling back to exiftool")
+        raw_uc = get_exiftool().read_user_comments([image_path]).get(image_path)
+    return {"UserComment": raw_uc} if raw_uc else {}
+
+# ---------- PNG szöveg chunk olvasó (csak a fejléc, az első IDAT-ig) ----------
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def _png_latin1(data):
+    # a tEXt/zTXt szabvány szerint latin-1, de sok program UTF-8-at ír bele
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+def read_png_text_chunks(image_path):
+    """
+    Végigmegy a PNG chunkokon és kigyűjti a tEXt / zTXt / iTXt tartalmát.
+    Az első IDAT-nál megáll, így a képadatot nem olvassa be.
+    Visszatér: {kulcsszó: szöveg}
+    """
+    texts = {}
+    with open(image_path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return texts
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            length, ctype = struct.unpack(">I4s", header)
+            if ctype in (b"IDAT", b"IEND"):
+                break
+            if ctype not in (b"tEXt", b"zTXt", b"iTXt"):
+                f.seek(length + 4, 1)       # adat + CRC átugrása
+                continue
+            data = f.read(length)
+            f.seek(4, 1)                    # CRC
+            try:
+                key, _, rest = data.partition(b"\x00")
+                key = key.decode("latin-1")
+                if ctype == b"tEXt":
+                    texts[key] = _png_latin1(rest)
+                elif ctype == b"zTXt":
+                    # rest[0] = tömörítési mód (0 = zlib)
+                    texts[key] = _png_latin1(zlib.decompress(rest[1:]))
+                else:
+                    comp_flag = rest[0]     # rest[1] = tömörítési mód (mindig zlib)
+                    _lang, _, rest = rest[2:].partition(b"\x00")
+                    _tkey, _, value = rest.partition(b"\x00")
+                    if comp_flag:
+                        value = zlib.decompress(value)
+                    texts[key] = value.decode("utf-8", errors="replace")
+            except (IndexError, zlib.error) as e:
+                debug_log(f"[ERROR] PNG {ctype.decode()} chunk in {image_path}: ({e})")
+    return texts